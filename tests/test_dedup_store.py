@@ -0,0 +1,17 @@
+import threading
+
+from dedup_store import DedupStore
+
+
+def test_concurrent_add_many_keeps_every_hash(tmp_path):
+    store = DedupStore(str(tmp_path / "processed.sqlite"))
+    hashes = [f"{i:032x}" for i in range(8000)]
+
+    threads = [threading.Thread(target=store.add_many, args=(hashes[i::8],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(h in store.bloom for h in hashes)
+    assert all(h in store for h in hashes)
@@ -0,0 +1,29 @@
+import pytest
+
+from json_repair import loads_tolerant
+
+
+@pytest.mark.parametrize("text, expected, repairs", [
+    ('{"ideas": [1, 2]}', {"ideas": [1, 2]}, []),
+    ('{"ideas": [1, 2,],}', {"ideas": [1, 2]}, ["trailing_commas"]),
+    ('{ideas: [{title: "A", score: 3}]}', {"ideas": [{"title": "A", "score": 3}]}, ["unquoted_keys"]),
+    ('[{"title": "A"}, {"title": "B", "score"', [{"title": "A"}], ["truncated"]),
+    ('{"ideas": [{"title": "A"}, {"title": "Unfinish', {"ideas": [{"title": "A"}]}, ["truncated"]),
+    ('{"ideas": [{"title": "A"}, {"title": "B"},', {"ideas": [{"title": "A"}, {"title": "B"}]}, ["truncated"]),
+    ('{"title": "a,] b", "tags": ["x",],}', {"title": "a,] b", "tags": ["x"]}, ["trailing_commas"]),
+    ('{"title": "see {draft}: v2,}", note: "x"}', {"title": "see {draft}: v2,}", "note": "x"}, ["unquoted_keys"]),
+    ('[{"q": "say \\"hi\\", {"}, {"q": "cut', [{"q": 'say "hi", {'}], ["truncated"]),
+])
+def test_repairs(text, expected, repairs):
+    assert loads_tolerant(text) == (expected, repairs)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Sorry, I can't help with that.",
+    '{"title": "cut before any object closed',
+    '{"a": 1 "b": 2}',
+])
+def test_unrepairable_input_raises(text):
+    with pytest.raises(ValueError):
+        loads_tolerant(text)
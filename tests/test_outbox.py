@@ -0,0 +1,119 @@
+import time
+
+from outbox import Outbox, OutboxEntry, sheets_append_handler
+
+
+class FakeWorksheet:
+    """Worksheet stand-in whose key column is C (3)."""
+
+    def __init__(self, rows=()):
+        self.rows = [list(row) for row in rows]
+        self.appends = []
+
+    def get(self, range_name):
+        assert range_name == "C2:C"
+        return [[row[2]] for row in self.rows]
+
+    def append_rows(self, rows):
+        self.appends.append(rows)
+        self.rows.extend(rows)
+
+
+def open_outbox(tmp_path, **kwargs):
+    return Outbox(str(tmp_path / "outbox.sqlite"), **kwargs)
+
+
+def test_duplicate_keys_are_ignored_even_after_delivery(tmp_path):
+    outbox = open_outbox(tmp_path)
+    assert outbox.enqueue("t", [("a", 1), ("b", 2)]) == 2
+    assert outbox.enqueue("t", [("a", 1), ("c", 3)]) == 1
+
+    delivered = []
+    outbox.register("t", lambda entries: delivered.extend(e.key for e in entries))
+    assert outbox.drain() == {"t": (3, 0)}
+    assert outbox.enqueue("t", [("a", 1)]) == 0
+    assert outbox.drain() == {}
+    assert delivered == ["a", "b", "c"]
+
+
+def test_failed_entry_backs_off(tmp_path):
+    outbox = open_outbox(tmp_path, base_delay=30.0)
+    outbox.enqueue("t", [("a", 1)])
+    calls = []
+
+    def handler(entries):
+        calls.append([e.key for e in entries])
+        return {"a": "boom"}
+
+    outbox.register("t", handler)
+    before = time.time()
+    assert outbox.drain() == {"t": (0, 1)}
+    assert outbox.drain() == {}
+    assert calls == [["a"]]
+
+    entry = outbox.entries()[0]
+    assert (entry["status"], entry["attempts"], entry["last_error"]) == ("pending", 1, "boom")
+    assert entry["next_attempt_at"] >= before + 30
+
+
+def test_entry_is_dead_after_max_attempts_until_retried(tmp_path):
+    outbox = open_outbox(tmp_path, max_attempts=2, base_delay=0.0)
+    outbox.enqueue("t", [("a", 1)])
+    outbox.register("t", lambda entries: {e.key: "boom" for e in entries})
+
+    outbox.drain()
+    assert outbox.counts() == {"t": {"pending": 1}}
+    outbox.drain()
+    assert outbox.counts() == {"t": {"dead": 1}}
+    assert outbox.drain() == {}
+
+    assert outbox.retry() == 1
+    assert outbox.counts() == {"t": {"pending": 1}}
+
+
+def test_drain_stops_target_at_first_failed_batch(tmp_path):
+    outbox = open_outbox(tmp_path)
+    outbox.enqueue("t", [(str(i), i) for i in range(6)])
+    batches = []
+
+    def handler(entries):
+        batches.append([e.key for e in entries])
+        raise ConnectionError("Sheets is down")
+
+    outbox.register("t", handler, batch_size=2)
+    assert outbox.drain() == {"t": (0, 2)}
+    assert batches == [["0", "1"]]
+    assert outbox.counts() == {"t": {"pending": 6}}
+
+
+def test_sheets_handler_skips_rows_an_earlier_attempt_wrote():
+    sheet = FakeWorksheet([["2025-01-01", "Old", "https://n/a"]])
+    handle = sheets_append_handler(sheet, 3)
+
+    handle([
+        OutboxEntry(1, "https://n/a", ["2025-01-01", "Old", "https://n/a"], 1),
+        OutboxEntry(2, "https://n/b", ["2025-01-02", "New", "https://n/b"], 1),
+    ])
+    assert sheet.appends == [[["2025-01-02", "New", "https://n/b"]]]
+
+
+def test_sheets_handler_first_attempt_appends_without_reading():
+    sheet = FakeWorksheet()
+    sheet.get = None  # a first attempt must not spend a read
+    handle = sheets_append_handler(sheet, 3)
+
+    assert handle([OutboxEntry(1, "https://n/a", ["2025-01-01", "A", "https://n/a"], 0)]) == {}
+    assert sheet.appends == [[["2025-01-01", "A", "https://n/a"]]]
+
+
+def test_prune_forgets_old_delivered_entries_only(tmp_path):
+    outbox = open_outbox(tmp_path, keep_days=30)
+    outbox.enqueue("t", [("old", 1), ("new", 2), ("queued", 3)])
+    outbox.register("t", lambda entries: {"queued": "boom"})
+    outbox.drain()
+    with outbox._lock:
+        outbox._conn.execute("UPDATE outbox SET sent_at = ? WHERE key = 'old'", (time.time() - 31 * 86400,))
+        outbox._conn.commit()
+
+    assert outbox.prune() == 1
+    assert sorted(e["key"] for e in outbox.entries()) == ["new", "queued"]
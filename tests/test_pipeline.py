@@ -0,0 +1,24 @@
+import threading
+
+from pipeline import log, parallel_map
+
+
+def test_parallel_map_yields_every_result():
+    assert sorted(parallel_map(lambda x: x * 2, range(50), workers=4)) == [x * 2 for x in range(50)]
+
+
+def test_log_lines_from_threads_do_not_interleave(capsys):
+    def worker(n):
+        for i in range(200):
+            log(f"📰 Feed {n}: {i} new articles")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lines = capsys.readouterr().out.split("\n")
+    assert lines.pop() == ""
+    assert len(lines) == 8 * 200
+    assert all(line.startswith("📰 Feed ") and line.count("📰") == 1 for line in lines)
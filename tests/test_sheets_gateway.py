@@ -0,0 +1,42 @@
+from sheets_gateway import GatedWorksheet
+
+
+class DirectGateway:
+    def call(self, kind, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.rows = [["a"]]
+        self.calls = []
+
+    def get(self, range_name=None, **kwargs):
+        self.calls.append((range_name, kwargs))
+        return [row + [kwargs.get("value_render_option", "FORMATTED_VALUE")] for row in self.rows]
+
+    def batch_get(self, ranges, **kwargs):
+        return [self.get(r, **kwargs) for r in ranges]
+
+
+def test_memo_key_includes_options():
+    ws = FakeWorksheet()
+    sheet = GatedWorksheet(DirectGateway(), ws)
+    assert sheet.get("A1:B") == [["a", "FORMATTED_VALUE"]]
+    assert sheet.get("A1:B", value_render_option="FORMULA") == [["a", "FORMULA"]]
+    assert sheet.batch_get(["A1:B"], value_render_option="FORMULA") == [[["a", "FORMULA"]]]
+    assert len(ws.calls) == 2
+
+
+def test_memo_expires_and_can_be_invalidated():
+    ws = FakeWorksheet()
+    sheet = GatedWorksheet(DirectGateway(), ws, cache_seconds=60)
+    sheet.get("A1:B")
+    ws.rows.append(["b"])  # appended by another process
+    assert len(sheet.get("A1:B")) == 1
+    sheet.invalidate()
+    assert len(sheet.get("A1:B")) == 2
+
+    sheet.cache_seconds = 0
+    ws.rows.append(["c"])
+    assert len(sheet.get("A1:B")) == 3
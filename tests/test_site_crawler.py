@@ -0,0 +1,38 @@
+import pytest
+
+from site_crawler import SiteCrawler
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+
+def make_crawler(monkeypatch, status_code, text=""):
+    crawler = SiteCrawler("https://example.com")
+    calls = []
+
+    def get(url, timeout=None):
+        calls.append(url)
+        return FakeResponse(status_code, text)
+
+    monkeypatch.setattr(crawler.session, "get", get)
+    return crawler, calls
+
+
+def test_robots_loaded_on_first_use_only(monkeypatch):
+    crawler, calls = make_crawler(monkeypatch, 200, "User-agent: *\nDisallow: /private/\nCrawl-delay: 2\n")
+    assert calls == []
+
+    assert crawler.allowed("https://example.com/post/")
+    assert not crawler.allowed("https://example.com/private/x")
+    assert crawler.delay == 2.0
+    assert calls == ["https://example.com/robots.txt"]
+
+
+@pytest.mark.parametrize("status_code, allowed", [(401, False), (403, False), (404, True), (410, True)])
+def test_robots_error_status(monkeypatch, status_code, allowed):
+    crawler, _ = make_crawler(monkeypatch, status_code)
+    assert crawler.allowed("https://example.com/post/") is allowed
+    assert crawler.delay == 0.0
@@ -0,0 +1,67 @@
+from news_summarizer import NewsSummarizer
+from dedup_store import DedupStore
+from outbox import Outbox
+from run_journal import RunJournal
+from story_dedup import StoryIndex
+
+
+def open_summarizer(data_dir):
+    """A NewsSummarizer wired to on-disk stores only (no feeds, LLM or Sheets)."""
+    summarizer = NewsSummarizer.__new__(NewsSummarizer)
+    summarizer.journal = RunJournal(str(data_dir / "journal.sqlite"))
+    summarizer.processed_urls = DedupStore(str(data_dir / "processed.sqlite"))
+    summarizer.story_index = StoryIndex(str(data_dir / "story_index.sqlite"))
+    summarizer.outbox = Outbox(str(data_dir / "outbox.sqlite"))
+    summarizer.sheets_enabled = False
+    return summarizer
+
+
+def test_flushed_batch_survives_crash_before_final_commit(tmp_path):
+    record = {'url': 'https://bc/a', 'title': 'Ransomware hits hospital chain', 'summary': 'Summary.',
+              'source': 'Bleeping Computer', 'category': 'cybersecurity', 'date': '2025-01-01'}
+    url_hash = NewsSummarizer.generate_url_hash(None, record['url'])
+
+    # First run: dedupe and summarize the article, flush its batch, then die
+    # before iter_summaries reaches its final commit
+    first = open_summarizer(tmp_path)
+    sig, _ = first.story_index.match(record['title'], record['summary'], record['source'])
+    first.story_index.add(sig, record['url'], record['title'], record['source'])
+    first.journal.record(record, [url_hash])
+    first.processed_urls.add_many([url_hash])
+    first.save_summaries_to_file([record], archive_dir=str(tmp_path / "archive"))
+
+    # Rerun from what reached disk
+    second = open_summarizer(tmp_path)
+    assert second.journal.pending() == []
+    assert url_hash in second.processed_urls
+    _, previous = second.story_index.match(record['title'], record['summary'], 'Dark Reading')
+    assert previous and previous['url'] == record['url']
+
+
+def test_unflushed_summary_is_resumed_after_crash(tmp_path):
+    record = {'url': 'https://bc/b', 'title': 'Chrome fixes zero-day', 'summary': 'Summary.',
+              'source': 'Bleeping Computer', 'category': 'cybersecurity', 'date': '2025-01-01'}
+    url_hash = NewsSummarizer.generate_url_hash(None, record['url'])
+
+    first = open_summarizer(tmp_path)
+    first.journal.record(record, [url_hash])
+    first.processed_urls.add_many([url_hash])
+
+    second = open_summarizer(tmp_path)
+    assert second.journal.pending() == [record]
+    assert second.journal.pending_hashes() == [url_hash]
+
+
+def test_run_pipeline_returns_summaries_and_wordpress_posts(tmp_path, monkeypatch):
+    records = [{'url': f'https://bc/{i}', 'title': f'Story {i}', 'summary': 'Summary.', 'source': 'Bleeping Computer',
+                'category': 'cybersecurity', 'date': '2025-01-01'} for i in range(3)]
+    summarizer = open_summarizer(tmp_path)
+    summarizer.sink_batch_size = 2
+    monkeypatch.setattr(summarizer, 'iter_summaries', lambda: iter(records))
+    monkeypatch.setattr(summarizer, 'save_summaries_to_file', lambda batch: None)
+
+    summaries, wp_posts = summarizer.run_pipeline()
+
+    assert summaries == records
+    assert [post['source_url'] for post in wp_posts] == [r['url'] for r in records]
+    assert all('Summary.' in post['content'] for post in wp_posts)
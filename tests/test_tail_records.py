@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from idea_generator import get_tail_records
+
+
+class FakeSheet:
+    """Worksheet stand-in: `rows` of data under a header, then blank rows to `row_count`."""
+
+    def __init__(self, rows, row_count):
+        self.header = ["title", "summary", "url"]
+        self.rows = [[f"t{i}", f"s{i}", f"u{i}"] for i in range(rows)]
+        self.row_count = row_count
+        self.reads = []
+
+    def row_values(self, row):
+        return self.header
+
+    def get(self, range_name):
+        start, last_col, end = re.fullmatch(r"A(\d+):([AC])(\d+)", range_name).groups()
+        start, end = int(start), int(end)
+        self.reads.append(range_name)
+        width = 1 if last_col == "A" else 3
+        # Like the API, rows past the last data row are left out
+        return [row[:width] for row in self.rows[start - 2:end - 1]]
+
+
+def test_tail_records_reads_bottom_rows_newest_first():
+    sheet = FakeSheet(rows=100, row_count=101)
+    records = get_tail_records(sheet, 30)
+    assert [r["url"] for r in records] == [f"u{i}" for i in range(99, 69, -1)]
+    assert sheet.reads == ["A72:C101"]
+
+
+@pytest.mark.parametrize("row_count", [1000, 5000, 20000])
+def test_tail_records_probe_reads_grow_logarithmically(row_count):
+    sheet = FakeSheet(rows=100, row_count=row_count)
+    records = get_tail_records(sheet, 30)
+    assert [r["url"] for r in records] == [f"u{i}" for i in range(99, 69, -1)]
+    assert len(sheet.reads) <= 12
+    # Only the first and last reads span every column
+    assert all(r.split(":")[1].startswith("A") for r in sheet.reads[1:-1])
+    assert sheet.reads[-1] == "A72:C101"
+
+
+def test_tail_records_short_sheet():
+    sheet = FakeSheet(rows=10, row_count=500)
+    records = get_tail_records(sheet, 30)
+    assert [r["url"] for r in records] == [f"u{i}" for i in range(9, -1, -1)]
+
+
+def test_tail_records_empty_sheet():
+    assert get_tail_records(FakeSheet(rows=0, row_count=1000), 30) == []
@@ -0,0 +1,24 @@
+import pytest
+
+from text_normalizer import remove_boilerplate
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Microsoft patched 60 flaws. Continue reading →", "Microsoft patched 60 flaws."),
+    ("Patch now. Keep reading on Dark Reading", "Patch now."),
+    ("Attackers used stolen tokens. Read more »", "Attackers used stolen tokens."),
+    ("Attackers used stolen tokens… Read the full story at The Hacker News", "Attackers used stolen tokens…"),
+    ("The flaw affects Exchange. [&#8230;] Read more", "The flaw affects Exchange."),
+])
+def test_trailing_calls_to_action_are_removed(text, expected):
+    assert remove_boilerplate(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Admins should read more about patching before the weekend rollout.",
+    "Users who keep reading phishing emails are most at risk, the report says.",
+    "Continue reading habits matter: staff who read the full policy report fewer incidents.",
+    "The report urges teams to read the rest of the advisory and continue reading vendor notes weekly.",
+])
+def test_prose_mentioning_reading_is_kept(text):
+    assert remove_boilerplate(text) == text
@@ -0,0 +1,102 @@
+"""
+Benchmark the lxml fast-path feed parser against feedparser.
+
+Usage (from workers/):
+    python bench_feed_parser.py --record   # download the configured feeds once
+    python bench_feed_parser.py            # time both parsers on the recorded copies
+"""
+import argparse
+import os
+import time
+
+import feedparser
+import requests
+
+from feed_parser import FeedParseError, iter_feed_entries
+from news_summarizer import NewsSummarizer
+
+SAMPLES_DIR = "../data/feed_samples"
+
+
+def sample_path(feed):
+    slug = "".join(ch if ch.isalnum() else "_" for ch in feed["name"].lower())
+    return os.path.join(SAMPLES_DIR, f"{slug}.xml")
+
+
+def record_samples(feeds):
+    os.makedirs(SAMPLES_DIR, exist_ok=True)
+    for feed in feeds:
+        try:
+            response = requests.get(feed["url"], timeout=20)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"⚠️  Could not record {feed['name']}: {e}")
+            continue
+        with open(sample_path(feed), "wb") as f:
+            f.write(response.content)
+        print(f"✅ Recorded {feed['name']} ({len(response.content) / 1024:.0f} KB)")
+
+
+def take(entries, limit):
+    taken = []
+    for entry in entries:
+        taken.append(entry.get("link", ""))
+        if len(taken) >= limit:
+            break
+    return taken
+
+
+def time_parser(func, body, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(body)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run_benchmark(feeds, iterations, limit):
+    print(f"{'feed':<24} {'KB':>6} {'feedparser ms':>14} {'fast ms':>9} {'speedup':>8}  links match")
+    totals = [0.0, 0.0]
+
+    for feed in feeds:
+        path = sample_path(feed)
+        if not os.path.exists(path):
+            print(f"{feed['name']:<24} (not recorded; run with --record)")
+            continue
+
+        with open(path, "rb") as f:
+            body = f.read()
+
+        slow_links = take(feedparser.parse(body).entries, limit)
+        try:
+            fast_links = take(iter_feed_entries(body), limit)
+        except FeedParseError as e:
+            print(f"{feed['name']:<24} fast path rejected the feed ({e}); feedparser fallback would be used")
+            continue
+
+        slow_ms = time_parser(lambda b: take(feedparser.parse(b).entries, limit), body, iterations)
+        fast_ms = time_parser(lambda b: take(iter_feed_entries(b), limit), body, iterations)
+        totals[0] += slow_ms
+        totals[1] += fast_ms
+
+        print(
+            f"{feed['name'][:24]:<24} {len(body) / 1024:>6.0f} {slow_ms:>14.2f} {fast_ms:>9.2f} "
+            f"{slow_ms / fast_ms if fast_ms else 0:>7.1f}x  {slow_links == fast_links}"
+        )
+
+    if totals[1]:
+        print(f"{'TOTAL':<24} {'':>6} {totals[0]:>14.2f} {totals[1]:>9.2f} {totals[0] / totals[1]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", action="store_true", help="download fresh copies of the configured feeds")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=25, help="entries to read per feed (max_depth)")
+    args = parser.parse_args()
+
+    # load_feeds() does not touch instance state, so skip the full constructor
+    feeds = NewsSummarizer.load_feeds(None)
+
+    if args.record:
+        record_samples(feeds)
+    run_benchmark(feeds, args.iterations, args.limit)
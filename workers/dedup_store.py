@@ -0,0 +1,199 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys, persisted as a raw bit array.
+    A negative answer is definitive; a positive one must be confirmed.
+    """
+
+    def __init__(self, capacity=500_000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: two 64-bit halves of one digest generate all k positions
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self, path):
+        header = json.dumps({
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+        }).encode("utf-8")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(len(header).to_bytes(4, "little"))
+            f.write(header)
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header_len = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+            bloom = cls(header["capacity"], header["error_rate"])
+            bits = f.read()
+
+        if len(bits) != len(bloom.bits):
+            raise ValueError("bit array size does not match header")
+        bloom.bits = bytearray(bits)
+        bloom.count = header["count"]
+        return bloom
+
+
+class DedupStore:
+    """
+    Set-like store of processed article URL hashes.
+
+    Hashes live in an indexed SQLite table with the time they were first
+    seen, so membership is a primary-key lookup and entries older than
+    ttl_days can be pruned. A Bloom filter in front answers most "never
+    seen" lookups without touching the database. Neither startup time nor
+    memory depends on how many URLs have been archived.
+    """
+
+    def __init__(self, path, ttl_days=180, bloom_capacity=500_000, legacy_json_path=None):
+        self.path = path
+        self.bloom_path = path + ".bloom"
+        self.ttl_days = ttl_days
+        self.bloom_capacity = bloom_capacity
+        self._lock = threading.Lock()
+        self.bloom = None
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "url_hash TEXT PRIMARY KEY, first_seen REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_first_seen ON processed(first_seen)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+        if legacy_json_path:
+            self._migrate_legacy_json(legacy_json_path)
+
+        self.bloom = self._load_bloom()
+
+    def _migrate_legacy_json(self, legacy_path):
+        """One-time import of the old processed_articles.json hash list."""
+        if not os.path.exists(legacy_path):
+            return
+
+        with open(legacy_path, "r") as f:
+            hashes = json.load(f)
+
+        self.add_many(hashes)
+        with self._lock:
+            self._conn.commit()
+        # Any existing filter predates the imported hashes; force a rebuild
+        if os.path.exists(self.bloom_path):
+            os.remove(self.bloom_path)
+        os.replace(legacy_path, legacy_path + ".migrated")
+        print(f"✅ Migrated {len(hashes)} processed hashes from {legacy_path}")
+
+    def _load_bloom(self):
+        if os.path.exists(self.bloom_path):
+            try:
+                bloom = BloomFilter.load(self.bloom_path)
+                if bloom.count <= bloom.capacity:
+                    return bloom
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Rebuilding unreadable Bloom filter {self.bloom_path}: {e}")
+        return self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+            bloom = BloomFilter(max(self.bloom_capacity, total * 2))
+            for (url_hash,) in self._conn.execute("SELECT url_hash FROM processed"):
+                bloom.add(url_hash)
+        return bloom
+
+    def __contains__(self, url_hash):
+        if url_hash not in self.bloom:
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM processed WHERE url_hash = ?", (url_hash,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def add(self, url_hash):
+        self.add_many([url_hash])
+
+    def add_many(self, url_hashes):
+        now = time.time()
+        rows = [(h, now) for h in url_hashes]
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO processed (url_hash, first_seen) VALUES (?, ?)", rows)
+            # Same lock as the insert: concurrent read-modify-writes of the bit
+            # array could otherwise lose bits. The filter is built after the
+            # legacy import, so it may not exist yet.
+            if self.bloom is not None:
+                for url_hash, _ in rows:
+                    if url_hash not in self.bloom:
+                        self.bloom.add(url_hash)
+
+    def get_meta(self, key, default=None):
+        """Read a JSON value stored alongside the hashes (e.g. sync watermarks)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        """Stage a JSON value; it is persisted by the next commit()."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def prune(self):
+        """Drop hashes first seen more than ttl_days ago. Returns the number removed."""
+        cutoff = time.time() - self.ttl_days * 86400
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM processed WHERE first_seen < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return removed
+
+    def commit(self):
+        """Flush pending inserts and persist the Bloom filter."""
+        with self._lock:
+            self._conn.commit()
+
+        # Pruned hashes still set bits; once the filter is over capacity its
+        # false-positive rate climbs, so rebuild it from the live rows.
+        if self.bloom.count > self.bloom.capacity:
+            self.bloom = self._rebuild_bloom()
+        self.bloom.save(self.bloom_path)
+
+    def close(self):
+        self.commit()
+        self._conn.close()
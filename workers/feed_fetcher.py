@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_USER_AGENT = "RobLoTech-ContentAutomation/1.0 (+https://roblotech.com)"
+
+
+# body is None when the server answered 304 Not Modified
+FeedResponse = namedtuple("FeedResponse", ["body", "etag", "last_modified", "not_modified"])
+
+
+class FeedTimeoutError(Exception):
+    """Raised when a single feed download runs past its wall-clock budget."""
+
+
+def content_hash(body):
+    """Stable fingerprint of a feed body, used to skip re-parsing identical payloads."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class FeedStateCache:
+    """
+    Per-feed conditional GET state (ETag, Last-Modified, content hash),
+    persisted as JSON so the next run can send If-None-Match / If-Modified-Since.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable feed state cache {path}: {e}")
+
+    def get(self, url):
+        with self._lock:
+            return dict(self._state.get(url, {}))
+
+    def update(self, url, etag, last_modified, body_hash):
+        with self._lock:
+            self._state[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": body_hash,
+            }
+
+    def save(self):
+        """Write the cache atomically so a crash never leaves half a file behind."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class FeedFetcher:
+    """
+    Download RSS/Atom feeds concurrently.
+
+    - max_workers: global cap on feeds in flight at once
+    - per_host: cap on simultaneous requests to the same host
+    - timeout: wall-clock seconds allowed for one feed download
+      (time spent waiting for a host slot is not counted)
+    """
+
+    def __init__(self, max_workers=8, per_host=2, timeout=20, user_agent=DEFAULT_USER_AGENT):
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.timeout = float(timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        """Return the semaphore guarding requests to this URL's host."""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def fetch(self, url, etag=None, last_modified=None, max_bytes=None):
+        """
+        Download `url`, sending conditional headers when validators are given.
+        With `max_bytes`, stop reading once that much has arrived (the body is
+        then truncated). Returns a FeedResponse; raises on HTTP errors or timeout.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        with self._host_slot(url):
+            deadline = time.monotonic() + self.timeout
+            response = self.session.get(
+                url,
+                headers=headers,
+                timeout=(min(5.0, self.timeout), self.timeout),
+                stream=True,
+            )
+            try:
+                if response.status_code == 304:
+                    return FeedResponse(None, etag, last_modified, True)
+
+                response.raise_for_status()
+                chunks = []
+                received = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if max_bytes and received >= max_bytes:
+                        break
+                    if time.monotonic() > deadline:
+                        raise FeedTimeoutError(f"{url} took longer than {self.timeout:.0f}s")
+
+                return FeedResponse(
+                    b"".join(chunks),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    False,
+                )
+            finally:
+                response.close()
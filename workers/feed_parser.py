@@ -0,0 +1,160 @@
+from io import BytesIO
+
+from lxml import etree
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RSS1_NS = "http://purl.org/rss/1.0/"
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+MEDIA_NS = "http://search.yahoo.com/mrss/"
+
+RSS_ITEM_TAGS = {"item", f"{{{RSS1_NS}}}item"}
+ATOM_ENTRY_TAG = f"{{{ATOM_NS}}}entry"
+
+
+class FeedParseError(Exception):
+    """The fast path cannot handle this document; callers should fall back to feedparser."""
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _text(el):
+    """Element text; XHTML content (child elements) is serialized back to markup."""
+    if el is None:
+        return ""
+    if len(el):
+        parts = [el.text or ""]
+        parts.extend(etree.tostring(child, encoding="unicode", with_tail=True) for child in el)
+        return "".join(parts).strip()
+    return (el.text or "").strip()
+
+
+def _first_text(el, *tags):
+    for tag in tags:
+        child = el.find(tag)
+        if child is not None:
+            value = _text(child)
+            if value:
+                return value
+    return ""
+
+
+def _compact(entry):
+    """Drop empty fields so entry.get(key, default) behaves like feedparser's entries."""
+    return {key: value for key, value in entry.items() if value}
+
+
+def _is_image(el):
+    medium = el.get("medium")
+    if medium:
+        return medium == "image"
+    mime = el.get("type")
+    return not mime or mime.startswith("image/")
+
+
+def _media_image(el):
+    """First image URL from Media RSS (media:content / media:thumbnail, also inside media:group)."""
+    for tag in (f"{{{MEDIA_NS}}}content", f".//{{{MEDIA_NS}}}content", f"{{{MEDIA_NS}}}thumbnail",
+                f".//{{{MEDIA_NS}}}thumbnail"):
+        for media in el.iterfind(tag):
+            if media.get("url") and _is_image(media):
+                return media.get("url")
+    return ""
+
+
+def _rss_entry(item):
+    ns = "" if item.tag == "item" else f"{{{RSS1_NS}}}"
+    link = _first_text(item, f"{ns}link")
+    if not link:
+        # Permalink GUIDs (RSS 2.0) or rdf:about (RSS 1.0) stand in for a missing <link>
+        guid = _first_text(item, "guid")
+        link = guid if guid.startswith("http") else item.get(
+            "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", ""
+        )
+    return _compact({
+        "link": link,
+        "title": _first_text(item, f"{ns}title"),
+        "published": _first_text(item, "pubDate", f"{{{DC_NS}}}date"),
+        "summary": _first_text(item, f"{ns}description", f"{{{CONTENT_NS}}}encoded"),
+        "image": _media_image(item) or next(
+            (enc.get("url") for enc in item.iterfind("enclosure")
+             if enc.get("url") and (enc.get("type") or "").startswith("image/")),
+            "",
+        ),
+    })
+
+
+def _atom_entry(entry):
+    link = ""
+    image = ""
+    for link_el in entry.iterfind(f"{{{ATOM_NS}}}link"):
+        rel = link_el.get("rel", "alternate")
+        if rel == "alternate" and link_el.get("href") and not link:
+            link = link_el.get("href")
+        elif rel == "enclosure" and link_el.get("href") and not image and _is_image(link_el):
+            image = link_el.get("href")
+    return _compact({
+        "link": link,
+        "title": _first_text(entry, f"{{{ATOM_NS}}}title"),
+        "published": _first_text(entry, f"{{{ATOM_NS}}}published", f"{{{ATOM_NS}}}updated"),
+        "summary": _first_text(entry, f"{{{ATOM_NS}}}summary", f"{{{ATOM_NS}}}content"),
+        "image": _media_image(entry) or image,
+    })
+
+
+def iter_feed_entries(body):
+    """
+    Stream entries from an RSS 2.0 / RSS 1.0 / Atom document as dicts with
+    link, title, published, summary and image (the only fields the summarizer
+    reads; image comes from media:content/thumbnail or an image enclosure).
+
+    Entries are yielded as soon as they are parsed and freed right after,
+    so a caller that stops early never parses the rest of the document.
+    Raises FeedParseError for malformed XML or an unknown root element.
+    """
+    context = etree.iterparse(
+        BytesIO(body),
+        events=("start", "end"),
+        resolve_entities=False,
+        no_network=True,
+        remove_comments=True,
+    )
+    root_checked = False
+
+    try:
+        for event, el in context:
+            if not root_checked:
+                if _local_name(el.tag) not in ("rss", "feed", "RDF"):
+                    raise FeedParseError(f"unsupported root element <{_local_name(el.tag)}>")
+                root_checked = True
+                continue
+
+            if event != "end":
+                continue
+
+            if el.tag in RSS_ITEM_TAGS:
+                yield _rss_entry(el)
+            elif el.tag == ATOM_ENTRY_TAG:
+                yield _atom_entry(el)
+            else:
+                continue
+
+            # Drop the finished entry and everything before it
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        raise FeedParseError(str(e)) from e
+
+
+def feedparser_image(entry):
+    """Image URL from a feedparser entry (media:content/thumbnail or an image enclosure), else ''."""
+    for media in entry.get("media_content", []) + entry.get("media_thumbnail", []):
+        if media.get("url") and _is_image(media):
+            return media["url"]
+    for link in entry.get("links", []):
+        if link.get("rel") == "enclosure" and link.get("href") and (link.get("type") or "").startswith("image/"):
+            return link["href"]
+    return ""
@@ -0,0 +1,180 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from story_dedup import MinHasher, band_buckets, pack_signature, similarity, story_tokens, unpack_signature
+
+# Spellings of the same concept, folded together before tokenizing
+SYNONYMS = [
+    (re.compile(r"\bsmall (?:and|&) medium(?:[- ]sized)? (?:businesses|business|enterprises)\b"), "small business"),
+    (re.compile(r"\bsmbs?\b|\bsmes?\b|\bsmall businesses\b"), "small business"),
+    (re.compile(r"\b(?:office|microsoft) 365\b|\bo365\b|\bm365\b"), "m365"),
+    (re.compile(r"\bmulti-?factor authentication\b|\btwo-factor authentication\b|\b2fa\b"), "mfa"),
+    (re.compile(r"\bzero day\b|\bzeroday\b|\b0-day\b"), "zero-day"),
+    (re.compile(r"\bartificial intelligence\b"), "ai"),
+]
+
+YEAR_RE = re.compile(r"\b(?:19|20)\d\d\b")
+
+# Filler that headline-style titles add without changing the topic
+TITLE_STOPWORDS = {
+    "guide", "ultimate", "complete", "essential", "everything", "need", "know", "things",
+    "ways", "tips", "really", "actually", "today", "right",
+}
+
+
+def _stem(token):
+    """Fold regular plurals ("businesses" -> "business", "policies" -> "policy")."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("es") and token[:-2].endswith(("ss", "x", "ch", "sh")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def idea_tokens(text):
+    """Normalized content words of an idea title/angle: synonyms folded, years dropped, plurals stemmed."""
+    text = (text or "").lower()
+    for pattern, replacement in SYNONYMS:
+        text = pattern.sub(replacement, text)
+    text = YEAR_RE.sub(" ", text)
+    return {_stem(t) for t in story_tokens(text) if t not in TITLE_STOPWORDS}
+
+
+def title_key(title):
+    return hashlib.blake2b((title or "").strip().lower().encode("utf-8"), digest_size=16).digest()
+
+
+class IdeaIndex:
+    """
+    Persistent near-duplicate index over Content_Backlog idea titles and angles.
+
+    Each idea gets two MinHash signatures, one of its title and one of
+    title + angle, after folding synonyms ("SMBs" / "small businesses"),
+    dropping years and stemming plurals. Both go into LSH band buckets in
+    SQLite, so a lookup only compares against ideas that share a bucket
+    and stays fast however large the backlog grows. An idea is a duplicate
+    when either similarity reaches `threshold`.
+
+    With 32 bands of 4 rows, pairs at 0.6 similarity become candidates
+    ~99% of the time and pairs at 0.3 only ~23%, so few candidates need
+    to be confirmed.
+    """
+
+    KINDS = ("title", "text")
+
+    def __init__(self, path="../data/idea_index.sqlite", threshold=0.6, num_perm=128, bands=32):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ideas ("
+            "id INTEGER PRIMARY KEY, key BLOB NOT NULL UNIQUE, title TEXT NOT NULL, "
+            "title_sig BLOB, text_sig BLOB, added_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_buckets ("
+            "kind INTEGER NOT NULL, band INTEGER NOT NULL, bucket BLOB NOT NULL, idea_id INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_idea_bucket ON lsh_buckets(kind, band, bucket)")
+        self._conn.commit()
+
+    def signatures(self, title, angle=""):
+        """(title signature, title + angle signature); either may be None for empty text."""
+        title_tokens = idea_tokens(title)
+        return (
+            self.hasher.signature(title_tokens),
+            self.hasher.signature(title_tokens | idea_tokens(angle)),
+        )
+
+    def find_similar(self, title, angle=""):
+        """Most similar indexed idea at or above threshold as {title, similarity}, or None."""
+        sigs = self.signatures(title, angle)
+
+        with self._lock:
+            row = self._conn.execute("SELECT title FROM ideas WHERE key = ?", (title_key(title),)).fetchone()
+            if row:
+                return {"title": row[0], "similarity": 1.0}
+
+            candidate_ids = set()
+            for kind, sig in enumerate(sigs):
+                if sig is None:
+                    continue
+                for band, bucket in band_buckets(sig, self.bands, self.rows):
+                    candidate_ids.update(r[0] for r in self._conn.execute(
+                        "SELECT idea_id FROM lsh_buckets WHERE kind = ? AND band = ? AND bucket = ?",
+                        (kind, band, bucket),
+                    ))
+            candidates = [
+                self._conn.execute("SELECT title, title_sig, text_sig FROM ideas WHERE id = ?", (idea_id,)).fetchone()
+                for idea_id in candidate_ids
+            ]
+
+        best = None
+        for row in candidates:
+            if row is None:
+                continue
+            scores = [
+                similarity(sig, unpack_signature(blob))
+                for sig, blob in zip(sigs, row[1:])
+                if sig is not None and blob
+            ]
+            score = max(scores, default=0.0)
+            if score >= self.threshold and (best is None or score > best["similarity"]):
+                best = {"title": row[0], "similarity": score}
+        return best
+
+    def add(self, title, angle=""):
+        """Index an idea (no-op if the same title is already indexed). Call commit() to persist."""
+        sigs = self.signatures(title, angle)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO ideas (key, title, title_sig, text_sig, added_at) VALUES (?, ?, ?, ?, ?)",
+                (title_key(title), title, pack_signature(sigs[0]), pack_signature(sigs[1]), time.time()),
+            )
+            if not cursor.rowcount:
+                return False
+            self._conn.executemany(
+                "INSERT INTO lsh_buckets (kind, band, bucket, idea_id) VALUES (?, ?, ?, ?)",
+                [
+                    (kind, band, bucket, cursor.lastrowid)
+                    for kind, sig in enumerate(sigs) if sig is not None
+                    for band, bucket in band_buckets(sig, self.bands, self.rows)
+                ],
+            )
+        return True
+
+    def sync(self, records):
+        """
+        Index backlog rows (dicts with idea_title / angle) that are not indexed
+        yet; only new rows are hashed. Commits and returns the number added.
+        """
+        with self._lock:
+            known = {r[0] for r in self._conn.execute("SELECT key FROM ideas")}
+
+        added = 0
+        for row in records:
+            title = str(row.get("idea_title") or "").strip()
+            if title and title_key(title) not in known:
+                added += self.add(title, str(row.get("angle") or ""))
+                known.add(title_key(title))
+        self.commit()
+        return added
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
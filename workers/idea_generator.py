@@ -1,12 +1,22 @@
 import os
-import json
+import threading
+from collections import Counter
 from datetime import datetime
 from dotenv import load_dotenv
 
-import gspread
-from google.oauth2.service_account import Credentials
+from gspread.utils import rowcol_to_a1
 from openai import OpenAI
 
+from idea_dedup import IdeaIndex
+from idea_ledger import IdeaLedger
+from json_repair import loads_tolerant
+from keyword_matcher import KeywordMatcher
+from llm_cache import LLMCache
+from llm_executor import LLMExecutor
+from outbox import SHEET_KEY_COLUMNS, Outbox, sheets_append_handler, sheets_target
+from sheets_gateway import get_gateway
+from trend_engine import TrendEngine
+
 load_dotenv()
 
 # Topics we care about most (mainstream / high-interest)
@@ -58,73 +68,65 @@ INTEREST_KEYWORDS = [
     "multi-factor",
 ]
 
+INTEREST_MATCHER = KeywordMatcher(INTEREST_KEYWORDS)
+
+# Row fields searched for interest keywords
+KEYWORD_FIELDS = ("title", "summary", "clean_summary", "source", "Category", "category")
+
+IDEAS_PER_ARTICLE = 3
+IDEA_TYPES = ("tutorial", "newsletter", "tool_review", "cheat_sheet")
+DIFFICULTIES = ("easy", "medium", "advanced")
+REQUIRED_IDEA_FIELDS = ("idea_title", "idea_type", "angle", "target_audience", "difficulty")
+OPTIONAL_IDEA_FIELDS = ("affiliate_potential", "notes")
+
+# Outbox target for Content_Backlog rows
+BACKLOG_TARGET = sheets_target("Content_Backlog")
+
+# Per-run counts of each kind of LLM response problem (updated from worker threads)
+IDEA_FAILURES = Counter()
+_failures_lock = threading.Lock()
+
+def count_failure(kind, amount=1):
+    with _failures_lock:
+        IDEA_FAILURES[kind] += amount
+
 def get_sheets_client():
-    """Connect to Google Sheets using the same service account JSON."""
-    creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-    if not creds_json:
+    """The shared Google Sheets gateway (same service account JSON as the summarizer)."""
+    gateway = get_gateway()
+    if not gateway:
         print("⚠️ GOOGLE_SERVICE_ACCOUNT_JSON not set; Sheets integration disabled")
-        return None
+    return gateway
 
-    try:
-        creds_info = json.loads(creds_json)
-        creds = Credentials.from_service_account_info(
-            creds_info,
-            scopes=[
-                "https://www.googleapis.com/auth/spreadsheets",
-                "https://www.googleapis.com/auth/drive",
-            ],
-        )
-        gc = gspread.authorize(creds)
-        print("✅ Connected to Google Sheets (idea generator)")
-        return gc
-    except Exception as e:
-        print(f"⚠️ Failed to initialize Google Sheets client for idea generator: {e}")
-        return None
+def item_keywords(news_item: dict) -> set:
+    """
+    Interest keywords found in a row's title/summary/source/category.
+    The row is scanned once and the result memoized on it under "_keywords",
+    so matching, counting and scoring all share a single pass.
+    """
+    found = news_item.get("_keywords")
+    if found is None:
+        haystack = " ".join(str(news_item[f]) for f in KEYWORD_FIELDS if news_item.get(f))
+        found = INTEREST_MATCHER.find(haystack)
+        news_item["_keywords"] = found
+    return found
 
 def matches_interest_keywords(news_item: dict) -> bool:
     """
     Return True if the news item looks broadly interesting / mainstream
-    based on simple keyword matching in title/summary/source/category.
+    based on whole-word keyword matching in title/summary/source/category.
     """
-    text_parts = [
-        news_item.get("title", ""),
-        news_item.get("summary", ""),
-        news_item.get("clean_summary", ""),
-        news_item.get("source", ""),
-        news_item.get("Category", ""),
-        news_item.get("category", ""),
-    ]
-
-    haystack = " ".join([p for p in text_parts if p]).lower()
-
-    for kw in INTEREST_KEYWORDS:
-        if kw.lower() in haystack:
-            return True
-
-    return False
+    return bool(item_keywords(news_item))
 
 def compute_keyword_counts(records):
     """
-    For a list of news records, count how many times each interest keyword appears
+    For a list of news records, count how many of them mention each interest keyword
     across the newest articles. This gives us a simple 'trend strength' measure.
     """
-    counts = {kw.lower(): 0 for kw in INTEREST_KEYWORDS}
+    counts = {kw: 0 for kw in INTEREST_MATCHER.keywords}
 
     for row in records:
-        text_parts = [
-            row.get("title", ""),
-            row.get("summary", ""),
-            row.get("clean_summary", ""),
-            row.get("source", ""),
-            row.get("Category", ""),
-            row.get("category", ""),
-        ]
-        haystack = " ".join([p for p in text_parts if p]).lower()
-
-        for kw in INTEREST_KEYWORDS:
-            key = kw.lower()
-            if key in haystack:
-                counts[key] += 1
+        for kw in item_keywords(row):
+            counts[kw] += 1
 
     return counts
 
@@ -138,62 +140,166 @@ def trend_score_for_item(news_item: dict, keyword_counts: dict) -> int:
       (e.g. if 'microsoft' appears in 5 recent items and 'ransomware' in 3,
        the trend_score is 5.)
     """
-    text_parts = [
-        news_item.get("title", ""),
-        news_item.get("summary", ""),
-        news_item.get("clean_summary", ""),
-        news_item.get("source", ""),
-        news_item.get("Category", ""),
-        news_item.get("category", ""),
-    ]
-    haystack = " ".join([p for p in text_parts if p]).lower()
+    return max((keyword_counts.get(kw, 0) for kw in item_keywords(news_item)), default=0)
 
-    score = 0
-    for kw in INTEREST_KEYWORDS:
-        key = kw.lower()
-        if key in haystack:
-            freq = keyword_counts.get(key, 0)
-            if freq > score:
-                score = freq
+def get_tail_records(sheet, count):
+    """
+    Return the last `count` data rows of a worksheet as dicts keyed by the
+    header row, newest (bottom) first.
+
+    The header is fetched once, then a `count`-row window at the bottom of
+    the grid. If the grid has blank rows below the data, the last data row
+    is found by probing column A in windows that double in size upward, so
+    the search costs a handful of narrow reads however tall the grid is, and
+    one more read takes exactly the last `count` data rows.
+    """
+    header = sheet.row_values(1)
+    if not header or count <= 0:
+        return []
+    last_col = rowcol_to_a1(1, len(header)).rstrip("0123456789")
+
+    end = sheet.row_count
+    start = max(2, end - count + 1)
+    values = sheet.get(f"A{start}:{last_col}{end}")
+    if not values or (len(values) < count and start > 2):
+        if values:
+            # Trailing blank rows are left out of the response, so the data
+            # ends inside this window
+            end = start + len(values) - 1
+        else:
+            window = count
+            while True:
+                if start == 2:
+                    return []
+                end = start - 1
+                window *= 2
+                start = max(2, end - window + 1)
+                column = sheet.get(f"A{start}:A{end}")
+                if column:
+                    end = start + len(column) - 1
+                    break
+        values = sheet.get(f"A{max(2, end - count + 1)}:{last_col}{end}")
+
+    values = values[-count:]
+    return [
+        dict(zip(header, list(row) + [""] * (len(header) - len(row))))
+        for row in reversed(values)
+        if any(cell != "" for cell in row)
+    ]
 
-    return score
 
-def get_recent_news_rows(gc, max_rows=5, scan_depth=30):
+def ingest_trend_rows(sheet, trend_engine):
+    """
+    Feed every Inoreader Articles row appended since the last run into the
+    trend engine, so its baselines count all articles, not only the newest
+    scan window.
+
+    Rows are read from the watermark stored with the engine state. That row
+    is re-read and its URL compared, so if rows were deleted or reordered
+    the whole sheet is read again (ingest skips articles it already has).
+    Returns the number of articles added.
+    """
+    header = sheet.row_values(1)
+    if not header:
+        return 0
+    last_col = rowcol_to_a1(1, len(header)).rstrip("0123456789")
+    url_idx = header.index("url") if "url" in header else 2
+
+    def row_url(row):
+        return str(row[url_idx]).strip() if len(row) > url_idx else ""
+
+    watermark = trend_engine.watermark
+    values = None
+    if watermark:
+        values = sheet.get(f"A{watermark['row']}:{last_col}")
+        if values and row_url(values[0]) == watermark["url"]:
+            start_row = watermark["row"] + 1
+            values = values[1:]
+        else:
+            print("⚠️  Sheet rows changed since the last trend update; re-reading Inoreader Articles")
+            values = None
+    if values is None:
+        start_row = 2
+        values = sheet.get(f"A2:{last_col}")
+
+    records = [dict(zip(header, list(row) + [""] * (len(header) - len(row)))) for row in values]
+    added = trend_engine.ingest(
+        (str(row["url"]).strip(), row.get("title", ""), row.get("date"), item_keywords(row))
+        for row in records if row.get("url")
+    )
+    if values:
+        trend_engine.watermark = {"row": start_row + len(values) - 1, "url": row_url(values[-1])}
+    trend_engine.save()
+    return added
+
+def get_recent_news_rows(gateway, max_rows=5, scan_depth=30, exclude_urls=None, trend_engine=None):
     """
     Read the newest news rows from 'Inoreader Articles',
     then filter to only those that match our interest keywords,
-    and rank them by a simple trend_score based on keyword frequencies.
+    and rank them by trend_score.
+
+    Candidates come only from the newest scan_depth rows.
+
+    With a TrendEngine, every row appended since its watermark is ingested
+    first (ingest_trend_rows), so keyword baselines cover the whole sheet,
+    not just the scan window. Candidates are then scored by how much their
+    keywords are bursting above that baseline, with older articles decayed.
+    Without an engine the simple in-window keyword frequency score
+    (trend_score_for_item) is used.
 
     - scan_depth: how many newest rows to scan (e.g. 30)
     - max_rows: maximum number of matching rows to return
+    - exclude_urls: article URLs already mined for ideas; these still count
+      toward keyword trends but are never selected
     """
     try:
-        sheet = gc.open("RobLoTech_Content_Ideas").worksheet("Inoreader Articles")
-        records = sheet.get_all_records()  # list of dicts, skipping header
-        if not records:
+        sheet = gateway.worksheet("Inoreader Articles")
+        # The summarizer appends at the bottom, so the newest `scan_depth` articles are the last rows
+        recent_candidates = get_tail_records(sheet, scan_depth)
+        if not recent_candidates:
             print("⚠️ No news records found in Inoreader Articles")
             return []
 
-        # Look at the newest `scan_depth` articles
-        recent_candidates = records[:scan_depth]
-
-        # Compute how often each interest keyword appears in these recent articles
-        keyword_counts = compute_keyword_counts(recent_candidates)
+        if trend_engine is not None:
+            added = ingest_trend_rows(sheet, trend_engine)
+            trending = ", ".join(
+                f"{t['keyword']} ({t['burst']}x)" for t in trend_engine.top_keywords(5)
+            )
+            print(f"🔥 Trend engine: {added} new articles ingested; trending: {trending or 'nothing yet'}")
+        else:
+            # Compute how often each interest keyword appears in these recent articles
+            keyword_counts = compute_keyword_counts(recent_candidates)
 
         # Filter by our interest keywords and compute a trend_score for each
+        exclude_urls = exclude_urls or set()
+        already_mined = 0
         filtered_with_scores = []
         for row in recent_candidates:
             if not matches_interest_keywords(row):
                 continue
 
-            score = trend_score_for_item(row, keyword_counts)
-            # Attach score so we can sort; we don't write this back to Sheets
-            row["_trend_score"] = score
+            if row.get("url") and str(row["url"]).strip() in exclude_urls:
+                already_mined += 1
+                continue
+
+            if trend_engine is None:
+                # Attach score so we can sort
+                row["_trend_score"] = trend_score_for_item(row, keyword_counts)
             filtered_with_scores.append(row)
 
+        if trend_engine is not None and filtered_with_scores:
+            scores = trend_engine.score_items(
+                (row.get("date"), item_keywords(row)) for row in filtered_with_scores
+            )
+            for row, score in zip(filtered_with_scores, scores):
+                row["_trend_score"] = round(float(score), 2)
+
+        if already_mined:
+            print(f"↩️  Skipped {already_mined} recent articles already mined for ideas")
+
         if not filtered_with_scores:
             print(
-                f"⚠️ No recent articles matched interest keywords in the newest {scan_depth} rows"
+                f"⚠️ No new recent articles matched interest keywords in the newest {scan_depth} rows"
             )
             return []
 
@@ -222,16 +328,36 @@ def get_recent_news_rows(gc, max_rows=5, scan_depth=30):
         print(f"⚠️ Error reading Inoreader Articles for idea generator: {e}")
         return []
 
-def get_backlog_sheet(gc):
+def get_backlog_sheet(gateway):
     """Get the Content_Backlog worksheet."""
     try:
-        sheet = gc.open("RobLoTech_Content_Ideas").worksheet("Content_Backlog")
+        sheet = gateway.worksheet("Content_Backlog")
         print("✅ Connected to Content_Backlog sheet")
         return sheet
     except Exception as e:
         print(f"⚠️ Error opening Content_Backlog sheet: {e}")
         return None
 
+def get_backlog_outbox(backlog_sheet):
+    """Outbox that delivers queued Content_Backlog rows to `backlog_sheet`."""
+    outbox = Outbox(
+        max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8)),
+        keep_days=float(os.getenv("OUTBOX_KEEP_DAYS", 30)),
+    )
+    outbox.register(
+        BACKLOG_TARGET,
+        sheets_append_handler(backlog_sheet, SHEET_KEY_COLUMNS["Content_Backlog"]),
+        batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", 100)),
+    )
+    return outbox
+
+def flush_backlog_outbox(outbox):
+    """Deliver queued backlog rows; returns the number appended."""
+    sent, failed = outbox.drain([BACKLOG_TARGET]).get(BACKLOG_TARGET, (0, 0))
+    if failed:
+        print(f"⏳ {failed} ideas queued for Content_Backlog; see `python outbox.py status`")
+    return sent
+
 def get_openai_client():
     api_key = os.getenv("OPENAI_API_KEY")
     base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
@@ -342,71 +468,203 @@ def extract_json_block(raw: str) -> str:
 
     return text
 
-def generate_ideas_for_news(client, news_item):
-    """Call OpenAI to generate ideas for a single news row and return a list of idea dicts."""
-    prompt = build_idea_prompt(news_item)
-
+def validate_idea(idea):
+    """
+    Check one idea against the schema the prompt asks for.
+    Returns (normalized idea or None, list of problems).
+    """
+    if not isinstance(idea, dict):
+        return None, ["not_an_object"]
+
+    problems = []
+    normalized = {}
+    for field in REQUIRED_IDEA_FIELDS + OPTIONAL_IDEA_FIELDS:
+        value = idea.get(field)
+        value = "" if value is None else str(value).strip()
+        if not value and field in REQUIRED_IDEA_FIELDS:
+            problems.append(f"missing_{field}")
+        normalized[field] = value
+
+    idea_type = normalized["idea_type"].lower().replace(" ", "_").replace("-", "_")
+    if idea_type and idea_type not in IDEA_TYPES:
+        problems.append("bad_idea_type")
+    normalized["idea_type"] = idea_type
+
+    difficulty = normalized["difficulty"].lower()
+    if difficulty and difficulty not in DIFFICULTIES:
+        problems.append("bad_difficulty")
+    normalized["difficulty"] = difficulty
+
+    return (None if problems else normalized), problems
+
+def parse_ideas(raw):
+    """
+    Parse an LLM response into (valid ideas, problems of the invalid ones).
+    Malformed JSON is repaired where possible; every repair and every
+    problem is counted in IDEA_FAILURES.
+    """
     try:
+        data, repairs = loads_tolerant(extract_json_block(raw))
+    except ValueError:
+        count_failure("invalid_json")
+        return [], ["invalid_json"]
+
+    for repair in repairs:
+        count_failure(f"repaired_{repair}")
+
+    if isinstance(data, dict):
+        # {"ideas": [...]} or a single idea object
+        data = next((v for v in data.values() if isinstance(v, list)), [data])
+    if not isinstance(data, list):
+        count_failure("not_a_list")
+        return [], ["not_a_list"]
+
+    valid = []
+    problems = []
+    for item in data:
+        idea, item_problems = validate_idea(item)
+        if idea:
+            valid.append(idea)
+        else:
+            problems.extend(item_problems)
+            for problem in item_problems:
+                count_failure(problem)
+    return valid, problems
+
+def build_retry_prompt(news_item, count, valid_ideas, problems):
+    """Short follow-up prompt asking only for the ideas that were missing or invalid."""
+    summary = (news_item.get("clean_summary") or news_item.get("summary", ""))[:400]
+    taken = "; ".join(idea["idea_title"] for idea in valid_ideas) or "none"
+    issues = ", ".join(sorted(set(problems))) or "missing ideas"
+    return f"""Article: {news_item.get("title", "")}
+Summary: {summary}
+
+Give {count} more content idea(s) for this article, different from: {taken}.
+The previous answer had problems ({issues}).
+
+Return ONLY a JSON array of {count} object(s) with these string keys:
+idea_title, idea_type ({" | ".join(IDEA_TYPES)}), angle, target_audience,
+difficulty ({" | ".join(DIFFICULTIES)}), affiliate_potential, notes"""
+
+def _complete(client, llm, model, messages, params, purpose):
+    if llm is not None:
+        response = llm.complete(model=model, messages=messages, purpose=purpose, **params)
+    else:
         response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert cybersecurity content strategist who outputs valid JSON only."
-                },
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=800,
-            temperature=0.7,
+            model=model,
+            messages=messages,
+            **params,
         )
+    return response.choices[0].message.content.strip()
 
-        raw = response.choices[0].message.content.strip()
-        cleaned = extract_json_block(raw)
+def _cached_completion(client, llm, cache, model, messages, params, purpose):
+    """(raw text, cache key, from_cache) for a request, using the LLMCache when given."""
+    cache_key = cache.make_key(model, messages, **params) if cache else None
+    raw = cache.get(cache_key) if cache else None
+    if raw is not None:
+        return raw, cache_key, True
+    return _complete(client, llm, model, messages, params, purpose), cache_key, False
 
-        # Try to parse as JSON
-        ideas = json.loads(cleaned)
+def generate_ideas_for_news(client, news_item, cache=None, llm=None):
+    """
+    Call OpenAI to generate ideas for a single news row and return a list of idea dicts.
+    If an LLMCache is given, a previous valid response for the same prompt is reused.
+    If an LLMExecutor is given, the call goes through it (rate limits, retries).
+
+    Malformed JSON is repaired instead of discarded, each idea is validated,
+    and only the missing or invalid ideas are re-requested with a short
+    follow-up prompt (IDEA_RETRY_ATTEMPTS times at most).
+    """
+    prompt = build_idea_prompt(news_item)
+    model = os.getenv("OPENAI_MODEL", "gpt-4o")
+    system = {
+        "role": "system",
+        "content": "You are an expert cybersecurity content strategist who outputs valid JSON only."
+    }
+    messages = [system, {"role": "user", "content": prompt}]
+    params = {"max_tokens": 800, "temperature": 0.7}
 
-        if not isinstance(ideas, list):
-            print("⚠️ OpenAI response was not a list; skipping this item")
+    try:
+        raw, cache_key, from_cache = _cached_completion(client, llm, cache, model, messages, params, "ideas")
+        ideas, problems = parse_ideas(raw)
+
+        # Only cache responses we could actually use
+        if cache and not from_cache and ideas:
+            cache.put(cache_key, model, raw)
+
+        for _ in range(int(os.getenv("IDEA_RETRY_ATTEMPTS", 1))):
+            missing = IDEAS_PER_ARTICLE - len(ideas)
+            if missing <= 0:
+                break
+
+            count_failure("retry_requests")
+            retry_messages = [system, {"role": "user", "content": build_retry_prompt(news_item, missing, ideas, problems)}]
+            retry_params = {"max_tokens": 300 * missing, "temperature": 0.7}
+            raw, cache_key, from_cache = _cached_completion(
+                client, llm, cache, model, retry_messages, retry_params, "ideas_retry"
+            )
+            extra, problems = parse_ideas(raw)
+            if cache and not from_cache and extra:
+                cache.put(cache_key, model, raw)
+            ideas.extend(extra[:missing])
+            count_failure("retry_recovered", len(extra[:missing]))
+
+        if not ideas:
+            print("⚠️ OpenAI response had no usable ideas; skipping this item")
             return []
 
         print(f"✅ Generated {len(ideas)} ideas for: {news_item.get('title', '')[:60]}...")
         return ideas
 
     except Exception as e:
+        count_failure("llm_error")
         print(f"⚠️ Error generating ideas from OpenAI: {e}")
         return []
 
-def get_existing_titles(backlog_sheet):
+def get_backlog_index(backlog_sheet, idea_index=None):
     """
-    Load existing idea titles from Content_Backlog so we don't create duplicates.
-    Titles are normalized to lowercase for comparison.
+    Load existing idea titles and source URLs from Content_Backlog in one read.
+    Titles are normalized to lowercase for comparison; source URLs tell us which
+    news articles were already mined, so they can be skipped before any LLM call.
+    If an IdeaIndex is given, backlog rows it has not seen yet are added to it.
+    Returns (titles, source_urls).
     """
     try:
         records = backlog_sheet.get_all_records()
+        if idea_index is not None:
+            added = idea_index.sync(records)
+            if added:
+                print(f"✅ Indexed {added} backlog ideas for near-duplicate checks")
         titles = set()
+        source_urls = set()
 
         for row in records:
             title = row.get("idea_title")
             if title:
-                norm = title.strip().lower()
+                norm = str(title).strip().lower()
                 if norm:
                     titles.add(norm)
 
-        print(f"✅ Loaded {len(titles)} existing idea titles from Content_Backlog")
-        return titles
+            source_url = str(row.get("source_url") or "").strip()
+            if source_url:
+                source_urls.add(source_url)
+
+        print(
+            f"✅ Loaded {len(titles)} existing idea titles from Content_Backlog "
+            f"({len(source_urls)} source articles)"
+        )
+        return titles, source_urls
     except Exception as e:
         print(f"⚠️ Error reading existing ideas from Content_Backlog: {e}")
-        return set()
-
-def append_ideas_to_backlog(backlog_sheet, news_item, ideas, existing_titles=None):
-    """Append generated ideas into Content_Backlog, skipping duplicate titles."""
-    if not ideas:
-        return 0
-
-    if existing_titles is None:
-        existing_titles = set()
+        return set(), set()
 
+def build_backlog_rows(news_item, ideas, existing_titles, idea_index=None):
+    """
+    Content_Backlog rows for a news item's ideas, skipping titles already in
+    `existing_titles` (which is updated) and, if an IdeaIndex is given, ideas
+    too similar to an indexed one (accepted ideas are added to the index).
+    Returns (rows, skipped duplicates).
+    """
     rows = []
     now_iso = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000Z")
     source_title = news_item.get("title", "")
@@ -427,6 +685,15 @@ def append_ideas_to_backlog(backlog_sheet, news_item, ideas, existing_titles=Non
             skipped += 1
             continue
 
+        if idea_index is not None:
+            similar = idea_index.find_similar(raw_title, idea.get("angle", ""))
+            if similar:
+                print(f"   ↩️  Skipping near-duplicate idea: {raw_title[:60]} "
+                      f"(~{similar['similarity']:.2f} like: {similar['title'][:60]})")
+                skipped += 1
+                continue
+            idea_index.add(raw_title, idea.get("angle", ""))
+
         # Record this title so we don't reuse it later in the same run
         existing_titles.add(norm_title)
 
@@ -445,52 +712,99 @@ def append_ideas_to_backlog(backlog_sheet, news_item, ideas, existing_titles=Non
             news_item.get("_trend_score", 0)       # strend_score
         ])
 
-    if not rows:
-        print("⚠️ No non-duplicate ideas to append for this news item")
-        return 0
+    return rows, skipped
 
-    try:
-        backlog_sheet.append_rows(rows)
-        print(f"✅ Appended {len(rows)} ideas to Content_Backlog (skipped {skipped} duplicates)")
-        return len(rows)
-    except Exception as e:
-        print(f"⚠️ Error appending ideas to Content_Backlog: {e}")
-        return 0
-
-def run_idea_generator(max_news_rows=5):
+def run_idea_generator(max_news_rows=None):
     """Main entry point to generate ideas from recent news."""
     print("Idea Generator - Starting")
     print("=" * 50)
 
+    if max_news_rows is None:
+        max_news_rows = int(os.getenv("IDEA_MAX_NEWS_ROWS", 5))
+    IDEA_FAILURES.clear()
+
     client = get_openai_client()
     if not client:
         return
 
-    gc = get_sheets_client()
-    if not gc:
+    gateway = get_sheets_client()
+    if not gateway:
         return
 
-    news_rows = get_recent_news_rows(gc, max_rows=max_news_rows)
-    if not news_rows:
-        print("⚠️ No recent news rows to process")
-        return
-
-    backlog_sheet = get_backlog_sheet(gc)
+    backlog_sheet = get_backlog_sheet(gateway)
     if not backlog_sheet:
         return
 
-    # Load existing titles once per run for de-duplication
-    existing_titles = get_existing_titles(backlog_sheet)
+    # Rows queued by an earlier run first, so the backlog read below includes them
+    outbox = get_backlog_outbox(backlog_sheet)
+    flush_backlog_outbox(outbox)
+
+    # Load existing titles and mined articles once per run for de-duplication
+    idea_index = IdeaIndex(threshold=float(os.getenv("IDEA_DUP_THRESHOLD", 0.6)))
+    existing_titles, backlog_urls = get_backlog_index(backlog_sheet, idea_index)
+    ledger = IdeaLedger()
+    ledger.prune()
+
+    trend_engine = TrendEngine(INTEREST_MATCHER.keywords)
+    news_rows = get_recent_news_rows(
+        gateway,
+        max_rows=max_news_rows,
+        scan_depth=int(os.getenv("IDEA_SCAN_DEPTH", 30)),
+        exclude_urls=backlog_urls | ledger.urls(),
+        trend_engine=trend_engine,
+    )
+    if not news_rows:
+        print("⚠️ No recent news rows to process")
+        return
 
-    total_ideas = 0
+    llm_cache = LLMCache()
+    llm = LLMExecutor(
+        client,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 6)),
+        rpm=int(os.getenv("LLM_RPM", 300)),
+        tpm=int(os.getenv("LLM_TPM", 30000)),
+        usage_log="../data/llm_usage.jsonl",
+    )
 
-    for news_item in news_rows:
-        ideas = generate_ideas_for_news(client, news_item)
-        total_ideas += append_ideas_to_backlog(backlog_sheet, news_item, ideas, existing_titles)
+    # OpenAI calls run concurrently; results come back in news_rows order
+    all_ideas = llm.map(lambda item: generate_ideas_for_news(client, item, cache=llm_cache, llm=llm), news_rows)
 
+    # Dedup stays serial so the same input always yields the same rows
+    rows = []
+    skipped = 0
+    mined = []
+    for news_item, ideas in zip(news_rows, all_ideas):
+        item_rows, item_skipped = build_backlog_rows(news_item, ideas, existing_titles, idea_index)
+        rows.extend(item_rows)
+        skipped += item_skipped
+        # Failed generations are not recorded, so they are retried next run
+        if ideas and news_item.get("url"):
+            mined.append((str(news_item["url"]).strip(), len(item_rows)))
+
+    # Rows are committed to the outbox first, so a Sheets failure delays them instead of losing them
+    total_ideas = len(rows)
+    if rows:
+        outbox.enqueue(BACKLOG_TARGET, [(row[3], row) for row in rows])
+        print(f"✅ Queued {len(rows)} ideas for Content_Backlog (skipped {skipped} duplicates)")
+    else:
+        print("⚠️ No non-duplicate ideas to append")
+
+    idea_index.commit()
+    for source_url, count in mined:
+        ledger.record(source_url, count)
+    appended = flush_backlog_outbox(outbox)
+
+    cache_stats = llm_cache.stats()
     print("\n📊 Idea generation complete")
     print(f"   News rows processed: {len(news_rows)}")
-    print(f"   Ideas added to backlog: {total_ideas}")
+    print(f"   Ideas added to backlog: {total_ideas} ({appended} appended to the sheet this run)")
+    print(f"   LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']}% hit rate)")
+    print(f"   LLM tokens: {llm.usage['input_tokens']} in, {llm.usage['output_tokens']} out over {llm.usage['calls']} calls")
+    if llm.usage['calls']:
+        usable = sum(len(ideas) for ideas in all_ideas)
+        print(f"   Paid calls per usable idea: {llm.usage['calls'] / max(usable, 1):.2f}")
+    if IDEA_FAILURES:
+        print("   Response problems: " + ", ".join(f"{k}={v}" for k, v in sorted(IDEA_FAILURES.items())))
 
 
 if __name__ == "__main__":
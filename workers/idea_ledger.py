@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class IdeaLedger:
+    """
+    Local record of news articles the idea generator has already mined.
+
+    Complements the source_url column of Content_Backlog: an article whose
+    ideas were all dropped as duplicates leaves no row in the sheet, but it
+    is still recorded here, so it is not sent to the LLM again tomorrow.
+    """
+
+    def __init__(self, path="../data/idea_ledger.sqlite", ttl_days=90):
+        self.path = path
+        self.ttl_days = ttl_days
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mined (source_url TEXT PRIMARY KEY, mined_at REAL NOT NULL, ideas INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def urls(self):
+        """Every source URL mined within the last ttl_days."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source_url FROM mined WHERE mined_at >= ?", (time.time() - self.ttl_days * 86400,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def record(self, source_url, ideas):
+        """Remember that `source_url` was mined, producing `ideas` new backlog rows."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mined (source_url, mined_at, ideas) VALUES (?, ?, ?)",
+                (source_url, time.time(), ideas),
+            )
+            self._conn.commit()
+
+    def prune(self):
+        """Forget entries older than ttl_days. Returns the number removed."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM mined WHERE mined_at < ?", (time.time() - self.ttl_days * 86400,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
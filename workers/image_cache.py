@@ -0,0 +1,223 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from io import BytesIO
+from urllib.parse import urljoin
+
+import lxml.html
+import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
+
+from pipeline import log
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow, images are cached as downloaded
+    Image = None
+
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+PAGE_IMAGE_XPATHS = (
+    '//meta[@property="og:image:secure_url"]/@content',
+    '//meta[@property="og:image"]/@content',
+    '//meta[@name="og:image"]/@content',
+    '//meta[@name="twitter:image"]/@content',
+    '//meta[@name="twitter:image:src"]/@content',
+)
+
+
+def page_image_url(body, base_url):
+    """og:image (or twitter:image) URL from an HTML page, resolved against base_url; '' if none."""
+    try:
+        doc = lxml.html.document_fromstring(body)
+    except (etree.ParserError, ValueError):
+        return ""
+
+    for xpath in PAGE_IMAGE_XPATHS:
+        for value in doc.xpath(xpath):
+            if value.strip():
+                return urljoin(base_url, value.strip())
+    return ""
+
+
+class ImageCache:
+    """
+    Content-addressed thumbnail cache shared by the news summarizer and the
+    WordPress publisher.
+
+    Downloaded images are resized (when Pillow is installed) and stored as
+    root/<ab>/<sha256 of the download>, so a picture referenced by several
+    URLs is kept once. An SQLite index maps source URLs to content hashes,
+    tracks last access for least-recently-used eviction once the files
+    exceed max_bytes, and remembers the WordPress media id each image was
+    uploaded as, so it is never uploaded twice.
+    """
+
+    def __init__(self, root="../data/thumbnails", max_bytes=200 * 1024 * 1024, max_size=1200,
+                 timeout=20, pool_size=8):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, filename TEXT NOT NULL, "
+            "mime TEXT NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_blobs_accessed ON blobs(accessed_at);"
+            "CREATE TABLE IF NOT EXISTS media (hash TEXT PRIMARY KEY, wp_media_id INTEGER NOT NULL);"
+        )
+        self._conn.commit()
+
+    def hash_for(self, url):
+        """Content hash already known for `url`, or None (the file itself may have been evicted)."""
+        with self._lock:
+            row = self._conn.execute("SELECT hash FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def path(self, image_hash):
+        """Local file for a cached image, or None if it is not (or no longer) cached."""
+        with self._lock:
+            row = self._conn.execute("SELECT filename FROM blobs WHERE hash = ?", (image_hash,)).fetchone()
+        if not row:
+            return None
+        path = os.path.join(self.root, row[0])
+        return path if os.path.exists(path) else None
+
+    def mime(self, image_hash):
+        with self._lock:
+            row = self._conn.execute("SELECT mime FROM blobs WHERE hash = ?", (image_hash,)).fetchone()
+        return row[0] if row else None
+
+    def fetch(self, url):
+        """
+        Content hash of the thumbnail for `url`, downloading it only if it is
+        not cached yet. Returns None if the URL is not a usable image.
+        """
+        image_hash = self.hash_for(url)
+        if image_hash and self.path(image_hash):
+            with self._lock:
+                self._conn.execute("UPDATE blobs SET accessed_at = ? WHERE hash = ?", (time.time(), image_hash))
+                self._conn.commit()
+            return image_hash
+
+        try:
+            data, mime = self._download(url)
+        except (requests.RequestException, ValueError) as e:
+            log(f"   ⚠️  Could not download image {url}: {e}")
+            return None
+
+        image_hash = hashlib.sha256(data).hexdigest()
+        data, mime = self._thumbnail(data, mime)
+        filename = os.path.join(image_hash[:2], image_hash + EXTENSIONS.get(mime, ".img"))
+
+        path = os.path.join(self.root, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (hash, filename, mime, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (image_hash, filename, mime, len(data), time.time()),
+            )
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, image_hash))
+            self._conn.commit()
+
+        self.evict()
+        return image_hash
+
+    def _download(self, url):
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            mime = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if not mime.startswith("image/"):
+                raise ValueError(f"not an image ({mime or 'no content type'})")
+
+            chunks = []
+            received = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received > MAX_IMAGE_BYTES:
+                    raise ValueError(f"larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+        return b"".join(chunks), mime
+
+    def _thumbnail(self, data, mime):
+        """Shrink to fit max_size x max_size as JPEG; originals are kept if Pillow cannot read them."""
+        if Image is None:
+            return data, mime
+        try:
+            with Image.open(BytesIO(data)) as img:
+                img.thumbnail((self.max_size, self.max_size))
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                out = BytesIO()
+                img.save(out, "JPEG", quality=85, optimize=True)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return data, mime
+        return out.getvalue(), "image/jpeg"
+
+    def media_id(self, image_hash):
+        """WordPress media id this image was uploaded as, if any."""
+        with self._lock:
+            row = self._conn.execute("SELECT wp_media_id FROM media WHERE hash = ?", (image_hash,)).fetchone()
+        return row[0] if row else None
+
+    def set_media_id(self, image_hash, media_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media (hash, wp_media_id) VALUES (?, ?)", (image_hash, media_id)
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes. Returns the number removed."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            removed = []
+            for image_hash, filename, size in self._conn.execute(
+                "SELECT hash, filename, size FROM blobs ORDER BY accessed_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.root, filename))
+                except FileNotFoundError:
+                    pass
+                removed.append((image_hash,))
+                total -= size
+
+            # URL and media-id rows are tiny and stay, so an evicted image is
+            # still recognized (and not re-uploaded) if it shows up again
+            self._conn.executemany("DELETE FROM blobs WHERE hash = ?", removed)
+            self._conn.commit()
+        return len(removed)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        self.session.close()
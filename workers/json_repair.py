@@ -0,0 +1,101 @@
+import json
+import re
+
+UNQUOTED_KEY_RE = re.compile(r"([{,]\s*)([A-Za-z_][\w\-]*)(\s*:)")
+TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def _split_strings(text):
+    """
+    Split text into (is_string, segment) pieces. An unterminated string at
+    the end (a truncated response) is returned as a string piece.
+    """
+    pieces = []
+    start = 0
+    i = 0
+    while i < len(text):
+        if text[i] != '"':
+            i += 1
+            continue
+        if i > start:
+            pieces.append((False, text[start:i]))
+        j = i + 1
+        while j < len(text) and text[j] != '"':
+            j += 2 if text[j] == "\\" else 1
+        pieces.append((True, text[i:j + 1]))
+        start = i = j + 1
+    if start < len(text):
+        pieces.append((False, text[start:]))
+    return pieces
+
+
+def _outside_strings(text, pattern, replacement):
+    """Apply a regex substitution to everything except string literals; returns (text, changed)."""
+    out = []
+    changed = False
+    for is_string, piece in _split_strings(text):
+        if not is_string:
+            new_piece = pattern.sub(replacement, piece)
+            changed = changed or new_piece != piece
+            piece = new_piece
+        out.append(piece)
+    return "".join(out), changed
+
+
+def _close_truncated(text):
+    """
+    If brackets are left open (the response was cut off), cut back to the
+    last complete object/array and close whatever is still open there, so
+    the partial trailing element is dropped rather than guessed at.
+    Returns (text, changed).
+    """
+    stack = []
+    cut = None
+    pos = 0
+    for is_string, piece in _split_strings(text):
+        if is_string:
+            pos += len(piece)
+            continue
+        for ch in piece:
+            if ch in CLOSERS:
+                stack.append(ch)
+            elif ch in "}]" and stack:
+                stack.pop()
+                cut = (pos + 1, list(stack))
+            pos += 1
+
+    if not stack:
+        return text, False
+    if cut is None:
+        return text, False
+
+    end, open_brackets = cut
+    head = text[:end].rstrip().rstrip(",")
+    return head + "".join(CLOSERS[ch] for ch in reversed(open_brackets)), True
+
+
+def loads_tolerant(text):
+    """
+    json.loads that repairs the usual LLM slips: unquoted keys, trailing
+    commas and output truncated mid-array (incomplete trailing elements are
+    dropped). Returns (value, repairs) where repairs names the fixes that
+    were needed; raises ValueError if the text still is not valid JSON.
+    """
+    try:
+        return json.loads(text), []
+    except ValueError:
+        pass
+
+    repairs = []
+    text, changed = _outside_strings(text, UNQUOTED_KEY_RE, r'\1"\2"\3')
+    if changed:
+        repairs.append("unquoted_keys")
+    text, changed = _close_truncated(text)
+    if changed:
+        repairs.append("truncated")
+    text, changed = _outside_strings(text, TRAILING_COMMA_RE, r"\1")
+    if changed:
+        repairs.append("trailing_commas")
+
+    return json.loads(text), repairs
@@ -0,0 +1,77 @@
+import re
+from collections import deque
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def plural_forms(token):
+    """The token plus its regular English plural ("browser" -> "browsers", "breach" -> "breaches")."""
+    if token[-1].isdigit():
+        return [token]
+    if token.endswith(("s", "x", "ch", "sh")):
+        return [token, token + "es"]
+    return [token, token + "s"]
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over word tokens for matching many keywords in
+    one pass.
+
+    Text and keywords are split into lowercase alphanumeric tokens, so
+    matches always fall on word boundaries ("sso" does not match "lesson")
+    and multi-word or hyphenated keywords match across any run of spaces or
+    punctuation ("zero-day" also matches "zero day"). A keyword's last word
+    also matches its regular plural ("data breaches"). The failure links are
+    folded into a full transition table at build time, so scanning costs a
+    single dict lookup per token however many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(kw.lower() for kw in keywords if TOKEN_RE.search(kw.lower())))
+
+        goto = [{}]
+        outputs = [set()]
+        for kw in self.keywords:
+            *prefix, last = TOKEN_RE.findall(kw)
+            state = 0
+            for token in prefix:
+                state = self._child(goto, outputs, state, token)
+            for token in plural_forms(last):
+                outputs[self._child(goto, outputs, state, token)].add(kw)
+
+        # Breadth-first: a state's failure target is always shallower, so it is complete before we need it
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for token, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(token, 0)
+                delta[state][token] = child
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs = [frozenset(out) for out in outputs]
+
+    @staticmethod
+    def _child(goto, outputs, state, token):
+        if token not in goto[state]:
+            goto.append({})
+            outputs.append(set())
+            goto[state][token] = len(goto) - 1
+        return goto[state][token]
+
+    def find(self, text):
+        """Set of keywords that occur in `text`."""
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for token in TOKEN_RE.findall(text.lower()):
+            state = delta[state].get(token, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
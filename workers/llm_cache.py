@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "../data/llm_cache.sqlite"
+
+
+def cache_enabled_from_env():
+    """LLM_CACHE=off (or 0/false/no) bypasses the cache for a run."""
+    return os.getenv("LLM_CACHE", "on").strip().lower() not in ("off", "0", "false", "no")
+
+
+class LLMCache:
+    """
+    On-disk, content-addressed cache of LLM completions.
+
+    Entries are keyed by a SHA-256 of model + messages (system and user
+    prompts) + sampling parameters, so any change to the prompt or settings
+    is a miss. Old entries are dropped by age, then least-recently-used
+    entries are dropped until the cache fits in max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_days=30, max_bytes=50 * 1024 * 1024,
+                 enabled=None):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.enabled = cache_enabled_from_env() if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if not self.enabled:
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions(accessed_at)")
+        self._conn.commit()
+        self.prune()
+
+    @staticmethod
+    def make_key(model, messages, **params):
+        """Hash everything that influences the completion into a stable cache key."""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached completion text, or None on a miss (or when disabled)."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, model, response_text):
+        """Store a completion. Empty responses are never cached."""
+        if not self.enabled or not response_text:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response_text, len(response_text.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+
+    def prune(self):
+        """Evict entries older than max_age_days, then LRU entries until under max_bytes."""
+        if not self.enabled:
+            return 0
+
+        with self._lock:
+            cutoff = time.time() - self.max_age_days * 86400
+            removed = self._conn.execute("DELETE FROM completions WHERE created_at < ?", (cutoff,)).rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                stale_keys = []
+                for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY accessed_at ASC"):
+                    if freed >= excess:
+                        break
+                    stale_keys.append((key,))
+                    freed += size
+                self._conn.executemany("DELETE FROM completions WHERE key = ?", stale_keys)
+                removed += len(stale_keys)
+
+            self._conn.commit()
+            return removed
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(hit_rate, 1)}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
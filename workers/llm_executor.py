@@ -0,0 +1,189 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from pipeline import log
+from text_normalizer import count_tokens
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute / 60` tokens per second.
+    acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        # A single request larger than the bucket would never fit; let it drain the bucket instead
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, delta):
+        """Give back (positive) or charge (negative) tokens once the real cost is known."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+def estimate_tokens(messages, max_tokens, model=None):
+    """Prompt + completion token estimate, counted with the local tokenizer."""
+    # ~4 tokens of chat framing per message
+    prompt_tokens = sum(count_tokens(m.get("content") or "", model) + 4 for m in messages)
+    return prompt_tokens + max_tokens
+
+
+def retry_after_seconds(error):
+    """Read Retry-After / retry-after-ms from an OpenAI error response, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class LLMExecutor:
+    """
+    Run chat completions with many requests in flight while staying under
+    requests-per-minute and tokens-per-minute limits.
+
+    429 / 5xx / connection errors are retried with exponential backoff and
+    full jitter; a Retry-After header pauses every worker, not just the one
+    that hit it.
+
+    Input/output token counts of every call are totalled in `usage` and,
+    when `usage_log` is set, appended to that file as one JSON line per call.
+    """
+
+    def __init__(self, client, max_concurrency=6, rpm=300, tpm=30000, max_retries=5,
+                 base_delay=1.0, max_delay=60.0, usage_log=None):
+        # We own retries here, so stop the SDK from retrying underneath us
+        self.client = client.with_options(max_retries=0)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.request_bucket = TokenBucket(rpm)
+        self.token_bucket = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._pause_lock = threading.Lock()
+        self._paused_until = 0.0
+
+        self.usage_log = usage_log
+        self.usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+        self._usage_lock = threading.Lock()
+        if usage_log:
+            os.makedirs(os.path.dirname(usage_log) or ".", exist_ok=True)
+
+    def _wait_if_paused(self):
+        with self._pause_lock:
+            delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pause(self, seconds):
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _record_usage(self, model, purpose, estimated_input, usage, latency):
+        record = {
+            "ts": round(time.time(), 3),
+            "model": model,
+            "purpose": purpose,
+            "input_tokens": getattr(usage, "prompt_tokens", None),
+            "output_tokens": getattr(usage, "completion_tokens", None),
+            "estimated_input_tokens": estimated_input,
+            "latency_ms": round(latency * 1000),
+        }
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["input_tokens"] += record["input_tokens"] or 0
+            self.usage["output_tokens"] += record["output_tokens"] or 0
+            if self.usage_log:
+                with open(self.usage_log, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def complete(self, model, messages, max_tokens, temperature, purpose=None, **kwargs):
+        """
+        Blocking, rate-limited chat completion; returns the raw SDK response.
+        `purpose` tags the call in the usage log (e.g. "summary").
+        """
+        estimate = estimate_tokens(messages, max_tokens, model)
+
+        for attempt in range(self.max_retries + 1):
+            self._wait_if_paused()
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(estimate)
+
+            started = time.monotonic()
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs,
+                )
+            except (openai.APIStatusError, openai.APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                if isinstance(e, openai.APIStatusError) and status not in RETRYABLE_STATUS_CODES:
+                    raise
+                if attempt >= self.max_retries:
+                    raise
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                    self._pause(retry_after)
+
+                log(f"   ⏳ LLM request failed ({status or type(e).__name__}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.token_bucket.adjust(estimate - usage.total_tokens)
+            self._record_usage(model, purpose, estimate - max_tokens, usage, time.monotonic() - started)
+            return response
+
+    def map(self, func, items):
+        """Run `func` over `items` with up to max_concurrency calls in flight; keeps input order."""
+        items = list(items)
+        if not items:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items))) as pool:
+            return list(pool.map(func, items))
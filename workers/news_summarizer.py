@@ -5,8 +5,23 @@ from dotenv import load_dotenv
 from openai import OpenAI
 import json
 import hashlib
-import gspread
-from google.oauth2.service_account import Credentials
+import threading
+from gspread.utils import rowcol_to_a1
+
+from dedup_store import DedupStore
+from feed_fetcher import FeedFetcher, FeedStateCache, content_hash
+from feed_parser import FeedParseError, feedparser_image, iter_feed_entries
+from image_cache import ImageCache, page_image_url
+from llm_cache import LLMCache
+from llm_executor import LLMExecutor, estimate_tokens
+from outbox import SHEET_KEY_COLUMNS, Outbox, sheets_append_handler, sheets_target
+from pipeline import chunked, log, parallel_map
+from run_journal import RunJournal
+from sheets_gateway import get_gateway
+from story_dedup import StoryIndex
+from summary_archive import SummaryArchive
+from summary_quality import failed_flags, quality_flags
+from text_normalizer import clean_text, normalize_article_text
 
 load_dotenv()
 
@@ -16,33 +31,72 @@ class NewsSummarizer:
             api_key=os.getenv('OPENAI_API_KEY'),
             base_url=os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
         )
+        self.llm = LLMExecutor(
+            self.client,
+            max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', 6)),
+            rpm=int(os.getenv('LLM_RPM', 300)),
+            tpm=int(os.getenv('LLM_TPM', 30000)),
+            usage_log='../data/llm_usage.jsonl',
+        )
+        self.llm_cache = LLMCache()
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o')
         self.max_length = int(os.getenv('SUMMARY_MAX_LENGTH', 120))
+        # Article text sent to the model is trimmed to this many tokens
+        self.input_token_budget = int(os.getenv('SUMMARY_INPUT_TOKENS', 300))
+        # Quality checks written to the sheet (NeedsCap, EndsWrong, TooShort, TooManySentences)
+        self.min_summary_words = int(os.getenv('SUMMARY_MIN_WORDS', 40))
+        self.max_summary_sentences = int(os.getenv('SUMMARY_MAX_SENTENCES', 6))
+        self.regenerate_attempts = int(os.getenv('SUMMARY_REGENERATE_ATTEMPTS', 1))
+        # Batch mode packs several articles into one request; 1 disables it
+        self.batch_size = int(os.getenv('SUMMARY_BATCH_SIZE', 1))
+        self.batch_token_budget = int(os.getenv('SUMMARY_BATCH_TOKEN_BUDGET', 6000))
         self.rss_feeds = self.load_feeds()
-        self.cache_file = '../data/processed_articles.json'
+        self.fetcher = FeedFetcher(
+            max_workers=int(os.getenv('FEED_MAX_WORKERS', 8)),
+            per_host=int(os.getenv('FEED_PER_HOST_LIMIT', 2)),
+            timeout=float(os.getenv('FEED_TIMEOUT', 20)),
+        )
+        self.feed_state = FeedStateCache('../data/feed_state.json')
+        self.image_cache = ImageCache(
+            '../data/thumbnails',
+            max_bytes=int(os.getenv('IMAGE_CACHE_MAX_MB', 200)) * 1024 * 1024,
+            pool_size=self.fetcher.max_workers,
+        )
+        self.cache_file = '../data/processed_articles.sqlite'
+        self.legacy_cache_file = '../data/processed_articles.json'
+        self.dedup_ttl_days = int(os.getenv('DEDUP_TTL_DAYS', 180))
+        self.journal = RunJournal('../data/summarizer_journal.sqlite')
+        self.sink_batch_size = int(os.getenv('SINK_BATCH_SIZE', 5))
+        self.cluster_lock = threading.Lock()
+        self.story_index = StoryIndex(
+            '../data/story_index.sqlite',
+            threshold=float(os.getenv('STORY_DUP_THRESHOLD', 0.45)),
+            ttl_days=int(os.getenv('STORY_DUP_TTL_DAYS', 7)),
+        )
         self.google_sheet = None
 
-        # --- Google Sheets setup via service account ---
-        creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-        if not creds_json:
-            print("⚠️ GOOGLE_SERVICE_ACCOUNT_JSON not set; Sheets integration disabled")
+        # --- Google Sheets setup via the shared, quota-governed gateway ---
+        gateway = get_gateway()
+        # Rows for the sheet go through the outbox, so they survive Sheets outages
+        self.sheets_enabled = gateway is not None
+        self.outbox = Outbox(
+            '../data/outbox.sqlite',
+            max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8)),
+            keep_days=float(os.getenv('OUTBOX_KEEP_DAYS', 30)),
+        )
+        if not gateway:
+            log("⚠️ GOOGLE_SERVICE_ACCOUNT_JSON not set; Sheets integration disabled")
         else:
             try:
-                creds_info = json.loads(creds_json)
-                creds = Credentials.from_service_account_info(
-                    creds_info,
-                    scopes=[
-                        "https://www.googleapis.com/auth/spreadsheets",
-                        "https://www.googleapis.com/auth/drive",
-                    ],
+                self.google_sheet = gateway.worksheet("Inoreader Articles")
+                self.outbox.register(
+                    sheets_target("Inoreader Articles"),
+                    sheets_append_handler(self.google_sheet, SHEET_KEY_COLUMNS["Inoreader Articles"]),
+                    batch_size=int(os.getenv('OUTBOX_BATCH_SIZE', 100)),
                 )
-                gc = gspread.authorize(creds)
-                # Use your actual sheet + tab names
-                sheet = gc.open("RobLoTech_Content_Ideas").worksheet("Inoreader Articles")
-                self.google_sheet = sheet
-                print("✅ Connected to Google Sheet: RobLoTech_Content_Ideas / Inoreader Articles")
+                log("✅ Connected to Google Sheet: RobLoTech_Content_Ideas / Inoreader Articles")
             except Exception as e:
-                print(f"⚠️ Failed to initialize Google Sheets client: {e}")
+                log(f"⚠️ Failed to initialize Google Sheets client: {e}")
                 self.google_sheet = None
 
         # Load processed URLs AFTER Google Sheets is set up
@@ -78,31 +132,76 @@ class NewsSummarizer:
         return mapping.get(source_name, "")
     
     def load_processed_cache(self):
-        """Load cache of already processed article URLs from local cache AND Google Sheets"""
-        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-        
-        processed_urls = set()
+        """Open the processed-URL store and merge in URLs already present in Google Sheets"""
+        processed_urls = DedupStore(
+            self.cache_file,
+            ttl_days=self.dedup_ttl_days,
+            legacy_json_path=self.legacy_cache_file,
+        )
         
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, 'r') as f:
-                processed_urls = set(json.load(f))
+        pruned = processed_urls.prune()
+        if pruned:
+            log(f"🧹 Pruned {pruned} processed URLs older than {self.dedup_ttl_days} days")
         
         if self.google_sheet:
             try:
-                existing_rows = self.google_sheet.get_all_records()
-                for row in existing_rows:
-                    if row.get('url'):
-                        processed_urls.add(self.generate_url_hash(row['url']))
-                print(f"✅ Loaded {len(existing_rows)} existing articles from Google Sheets")
+                synced = self.sync_sheet_urls(processed_urls)
+                processed_urls.commit()
+                log(f"✅ Synced {synced} new article URLs from Google Sheets")
             except Exception as e:
-                print(f"⚠️  Could not read from Google Sheets: {e}")
+                log(f"⚠️  Could not read from Google Sheets: {e}")
         
         return processed_urls
+
+    def sync_sheet_urls(self, processed_urls):
+        """
+        Merge URLs appended to the sheet since the last run into the dedup store.
+
+        Only the `url` column is read, starting at the last row synced before.
+        That row is re-read and compared with the URL stored for it, so if rows
+        were deleted or reordered the sync falls back to a full column read.
+        Returns the number of rows read past the watermark.
+        """
+        sheet = self.google_sheet
+        meta_key = f"sheet_sync:{sheet.spreadsheet.id}:{sheet.id}"
+        watermark = processed_urls.get_meta(meta_key)
+
+        if watermark:
+            values = self._read_url_column(watermark['url_col'], watermark['row'])
+            first = values[0][0] if values and values[0] else ''
+            if first == watermark['url']:
+                new_values = values[1:]
+                start_row = watermark['row'] + 1
+                url_col = watermark['url_col']
+            else:
+                log("⚠️  Sheet rows changed since last sync; re-reading the url column")
+                watermark = None
+
+        if not watermark:
+            header = sheet.row_values(1)
+            url_col = header.index('url') + 1 if 'url' in header else 3
+            new_values = self._read_url_column(url_col, 2)
+            start_row = 2
+
+        urls = [row[0] for row in new_values if row and row[0]]
+        processed_urls.add_many(self.generate_url_hash(url) for url in urls)
+
+        if new_values:
+            last_row = start_row + len(new_values) - 1
+            last_value = new_values[-1][0] if new_values[-1] else ''
+            processed_urls.set_meta(meta_key, {'row': last_row, 'url': last_value, 'url_col': url_col})
+
+        return len(new_values)
+
+    def _read_url_column(self, url_col, start_row):
+        """Return the url column from `start_row` to the last non-empty row."""
+        start = rowcol_to_a1(start_row, url_col)
+        column_letter = start.rstrip('0123456789')
+        return self.google_sheet.get(f"{start}:{column_letter}")
     
     def save_processed_cache(self):
-        """Save processed URLs to cache"""
-        with open(self.cache_file, 'w') as f:
-            json.dump(list(self.processed_urls), f)
+        """Flush processed URLs to the dedup store"""
+        self.processed_urls.commit()
     
     def generate_url_hash(self, url):
         """Generate hash for URL deduplication"""
@@ -137,43 +236,81 @@ class NewsSummarizer:
         Looks deeper into the feed (up to max_depth entries) to find unseen items.
         """
         try:
-            feed = feedparser.parse(feed_url)
-            entries = feed.entries[:max_depth]  # Look deep into recent posts
-            new_articles = []
-
-            for entry in entries:
-                url = entry.get('link', '')
-                if not url:
-                    continue
-
-                url_hash = self.generate_url_hash(url)
+            state = self.feed_state.get(feed_url)
+            response = self.fetcher.fetch(
+                feed_url,
+                etag=state.get('etag'),
+                last_modified=state.get('last_modified'),
+            )
 
-                # Skip if already processed
-                if url_hash in self.processed_urls:
-                    continue
+            # Nothing changed since the last fully-drained fetch: skip parsing
+            if response.not_modified:
+                return []
+            body_hash = content_hash(response.body)
+            if body_hash == state.get('content_hash'):
+                self.feed_state.update(feed_url, response.etag, response.last_modified, body_hash)
+                return []
 
-                new_articles.append({
-                    'title': entry.get('title', 'Untitled'),
-                    'url': url,
-                    'url_hash': url_hash,
-                    'published': entry.get('published', ''),
-                    'summary': entry.get('summary', '')[:1000]
-                })
+            try:
+                new_articles = self.collect_new_entries(iter_feed_entries(response.body), max_new, max_depth)
+            except FeedParseError as e:
+                log(f"   Fast parser failed for {feed_url} ({e}); falling back to feedparser")
+                feed = feedparser.parse(response.body)
+                new_articles = self.collect_new_entries(feed.entries, max_new, max_depth)
 
-                # Stop once we have enough new articles
-                if len(new_articles) >= max_new:
-                    break
+            # Only remember validators once every unseen entry has been picked up;
+            # otherwise a 304 next run would hide the entries left behind by max_new.
+            if len(new_articles) < max_new:
+                self.feed_state.update(feed_url, response.etag, response.last_modified, body_hash)
 
             return new_articles
 
         except Exception as e:
-            print(f"Error fetching {feed_url}: {e}")
+            log(f"Error fetching {feed_url}: {e}")
             return []
     
-    def summarize_with_ai(self, title, content):
-        """Generate AI summary using OpenAI"""
-        try:
-            prompt = f"""Summarize this cybersecurity/tech news article in exactly {self.max_length} words or less.
+    def collect_new_entries(self, entries, max_new, max_depth):
+        """
+        Take up to `max_new` unseen articles from the first `max_depth` entries.
+        `entries` may be a lazy iterator; it is not consumed past the stopping point.
+        """
+        new_articles = []
+
+        for depth, entry in enumerate(entries):
+            if depth >= max_depth:  # Look deep into recent posts, but no further
+                break
+
+            url = entry.get('link', '')
+            if not url:
+                continue
+
+            url_hash = self.generate_url_hash(url)
+
+            # Skip if already processed
+            if url_hash in self.processed_urls:
+                continue
+
+            new_articles.append({
+                'title': clean_text(entry.get('title', '')) or 'Untitled',
+                'url': url,
+                'url_hash': url_hash,
+                'published': entry.get('published', ''),
+                'summary': normalize_article_text(entry.get('summary', ''), self.input_token_budget, self.model),
+                'image_url': entry.get('image') or feedparser_image(entry)
+            })
+
+            # Stop once we have enough new articles
+            if len(new_articles) >= max_new:
+                break
+
+        return new_articles
+    
+    SUMMARY_SYSTEM_PROMPT = "You are a cybersecurity journalist who creates concise, accurate news summaries."
+    SUMMARY_PARAMS = {'max_tokens': 200, 'temperature': 0.7}
+
+    def build_summary_messages(self, title, content):
+        """Chat messages for summarizing a single article"""
+        prompt = f"""Summarize this cybersecurity/tech news article in exactly {self.max_length} words or less.
 Focus on the key facts, impact, and takeaways. Write in a clear, engaging style for IT professionals and non-technical readers.
 
 Title: {title}
@@ -181,122 +318,468 @@ Title: {title}
 Content: {content}
 
 Summary:"""
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a cybersecurity journalist who creates concise, accurate news summaries."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
+        return [
+            {"role": "system", "content": self.SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def summary_cache_key(self, title, content):
+        """Cache key for an article's summary, shared by single and batch mode"""
+        messages = self.build_summary_messages(title, content)
+        return self.llm_cache.make_key(self.model, messages, **self.SUMMARY_PARAMS)
+
+    def summarize_with_ai(self, title, content):
+        """Generate AI summary using OpenAI"""
+        try:
+            cache_key = self.summary_cache_key(title, content)
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            messages = self.build_summary_messages(title, content)
+            response = self.llm.complete(model=self.model, messages=messages, purpose='summary', **self.SUMMARY_PARAMS)
             
             summary = response.choices[0].message.content.strip()
+            self.llm_cache.put(cache_key, self.model, summary)
             return summary
             
         except Exception as e:
-            print(f"AI summarization error: {e}")
+            log(f"AI summarization error: {e}")
             return content[:self.max_length] + "..."
+
+    def is_valid_summary(self, summary):
+        """Basic shape check for summaries coming back from a batch request"""
+        if not isinstance(summary, str) or not summary.strip():
+            return False
+        # Allow some slack over the requested word count before rejecting
+        return len(summary.split()) <= int(self.max_length * 1.25)
+
+    def pack_batches(self, entries):
+        """
+        Greedily group entries into batches of at most `batch_size` articles
+        whose estimated prompt + output tokens stay within `batch_token_budget`.
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+
+        for entry in entries:
+            cost = estimate_tokens(
+                [{"content": entry['title']}, {"content": entry['summary']}],
+                self.SUMMARY_PARAMS['max_tokens'],
+                self.model,
+            )
+            if current and (len(current) >= self.batch_size or current_tokens + cost > self.batch_token_budget):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(entry)
+            current_tokens += cost
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def summarize_batch(self, entries):
+        """
+        Summarize several articles in one structured-JSON request.
+
+        Returns a dict of url_hash -> summary for every article that came
+        back valid; missing or invalid items are left for the caller to
+        retry one at a time.
+        """
+        ids = {f"a{i}": entry for i, entry in enumerate(entries)}
+        articles = [
+            {"id": article_id, "title": entry['title'], "content": entry['summary']}
+            for article_id, entry in ids.items()
+        ]
+        prompt = f"""Summarize each of the following cybersecurity/tech news articles in {self.max_length} words or less.
+Focus on the key facts, impact, and takeaways. Write in a clear, engaging style for IT professionals and non-technical readers.
+Summarize every article independently; never mix facts between articles.
+
+Articles (JSON):
+{json.dumps(articles, ensure_ascii=False)}
+
+Return JSON only, in this exact shape, with one item per article id:
+{{"summaries": [{{"id": "a0", "summary": "..."}}]}}"""
+
+        messages = [
+            {"role": "system", "content": self.SUMMARY_SYSTEM_PROMPT + " You output valid JSON only."},
+            {"role": "user", "content": prompt}
+        ]
+
+        try:
+            response = self.llm.complete(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.SUMMARY_PARAMS['max_tokens'] * len(entries),
+                temperature=self.SUMMARY_PARAMS['temperature'],
+                purpose='summary_batch',
+                response_format={"type": "json_object"},
+            )
+            items = json.loads(response.choices[0].message.content).get('summaries', [])
+        except Exception as e:
+            log(f"AI batch summarization error: {e}")
+            return {}
+
+        results = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            entry = ids.get(item.get('id'))
+            summary = item.get('summary')
+            if entry is None or not self.is_valid_summary(summary):
+                continue
+            summary = summary.strip()
+            results[entry['url_hash']] = summary
+            self.llm_cache.put(self.summary_cache_key(entry['title'], entry['summary']), self.model, summary)
+
+        return results
+
+    def summarize_entries(self, entries):
+        """
+        Summarize entries, returning summaries in the same order.
+        Uses batch mode when batch_size > 1, falling back to per-article
+        calls for anything a batch did not return valid.
+        """
+        if self.batch_size <= 1:
+            return [self.summarize_with_ai(entry['title'], entry['summary']) for entry in entries]
+
+        results = {}
+        uncached = []
+        for entry in entries:
+            cached = self.llm_cache.get(self.summary_cache_key(entry['title'], entry['summary']))
+            if cached is not None:
+                results[entry['url_hash']] = cached
+            else:
+                uncached.append(entry)
+
+        for batch in self.pack_batches(uncached):
+            results.update(self.summarize_batch(batch))
+
+        retry = [entry for entry in uncached if entry['url_hash'] not in results]
+        if retry:
+            log(f"   Retrying {len(retry)} articles one at a time...")
+        for entry in retry:
+            results[entry['url_hash']] = self.summarize_with_ai(entry['title'], entry['summary'])
+
+        return [results[entry['url_hash']] for entry in entries]
+
+    def check_quality(self, summaries):
+        """Quality flags for a batch of summary texts (see summary_quality.quality_flags)"""
+        return quality_flags(summaries, self.min_summary_words, self.max_summary_sentences)
+
+    QUALITY_FIXES = {
+        'NeedsCap': "Start with a capital letter.",
+        'EndsWrong': "End with a complete sentence and a period; do not trail off.",
+        'TooShort': "Use at least {min_words} words.",
+        'TooManySentences': "Use no more than {max_sentences} sentences.",
+    }
+
+    def regenerate_summary(self, entry, summary, problems):
+        """Ask the model to rewrite a summary that failed quality checks; None on error"""
+        fixes = " ".join(
+            self.QUALITY_FIXES[name].format(min_words=self.min_summary_words, max_sentences=self.max_summary_sentences)
+            for name in problems
+        )
+        messages = self.build_summary_messages(entry['title'], entry['summary']) + [
+            {"role": "assistant", "content": summary},
+            {"role": "user", "content": f"Rewrite this summary in {self.max_length} words or less. {fixes}"},
+        ]
+        try:
+            response = self.llm.complete(model=self.model, messages=messages, purpose='summary_regenerate', **self.SUMMARY_PARAMS)
+            return response.choices[0].message.content.strip() or None
+        except Exception as e:
+            log(f"AI regeneration error: {e}")
+            return None
+
+    def fix_failed_summaries(self, entries, summaries):
+        """
+        Regenerate summaries that fail the quality checks. A rewrite is kept
+        only if it fails fewer checks than the summary it replaces, and then
+        also replaces the cached summary so later runs reuse it.
+        """
+        summaries = list(summaries)
+        for _ in range(self.regenerate_attempts):
+            flags = self.check_quality(summaries)
+            failed = flags.index[flags.any(axis=1)].tolist()
+            if not failed:
+                break
+
+            rewrites = {}
+            for i in failed:
+                problems = failed_flags(flags.loc[i])
+                log(f"   🔁 Regenerating ({', '.join(problems)}): {entries[i]['title'][:60]}")
+                rewritten = self.regenerate_summary(entries[i], summaries[i], problems)
+                if rewritten:
+                    rewrites[i] = rewritten
+            if not rewrites:
+                break
+
+            new_flags = self.check_quality(rewrites.values())
+            for (i, rewritten), (_, row) in zip(rewrites.items(), new_flags.iterrows()):
+                if row.sum() < flags.loc[i].sum():
+                    summaries[i] = rewritten
+                    entry = entries[i]
+                    self.llm_cache.put(self.summary_cache_key(entry['title'], entry['summary']), self.model, rewritten)
+
+        return summaries
     
-    def process_all_feeds(self):
-        """Process all RSS feeds and generate summaries"""
-        all_summaries = []
-        
-        print(f"Processing {len(self.rss_feeds)} RSS feeds...")
-        
-        for feed_config in self.rss_feeds:
-            print(f"\n📰 {feed_config['name']}...")
-            entries = self.fetch_rss_entries(feed_config['url'])
-            
-            print(f"   Found {len(entries)} new articles")
-            
+    def fetch_feed(self, feed_config):
+        """Pipeline stage: fetch one feed, returning (feed_config, new entries)"""
+        entries = self.fetch_rss_entries(feed_config['url'])
+        log(f"📰 {feed_config['name']}: {len(entries)} new articles")
+        return feed_config, entries
+
+    def find_page_image(self, url):
+        """og:image of an article page; only the start of the page is downloaded"""
+        try:
+            response = self.fetcher.fetch(url, max_bytes=256 * 1024)
+        except Exception as e:
+            log(f"   ⚠️  Could not fetch {url} for its image: {e}")
+            return ''
+        return page_image_url(response.body, url)
+
+    def attach_image(self, cluster):
+        """
+        Pipeline stage: make sure a story has a featured image and that its
+        thumbnail is in the local cache. The article page is fetched only
+        when the feed did not carry an image.
+        """
+        _, entry = cluster['members'][0]
+        if not entry.get('image_url'):
+            entry['image_url'] = self.find_page_image(entry['url'])
+        if entry['image_url']:
+            self.image_cache.fetch(entry['image_url'])
+        return cluster
+
+    def dedupe_stories(self, fetched):
+        """
+        Pipeline stage: turn fetched feeds into story clusters to summarize.
+
+        Drops URLs already seen earlier in this run and near-duplicates of a
+        story from another source. A near-duplicate of a story still waiting
+        for its summary is attached to it as a related source; repeats of a
+        story that is already summarized (this run or a previous one) are
+        just marked as processed. Each accepted story goes into the story
+        index immediately, so later feeds are checked against it.
+        """
+        seen_this_run = set()
+        open_clusters = {}
+
+        for feed_config, entries in fetched:
             for entry in entries:
-                print(f"   Summarizing: {entry['title'][:60]}...")
-                
-                summary = self.summarize_with_ai(entry['title'], entry['summary'])
-                
-                all_summaries.append({
-                    'date': self.normalize_date(entry.get('published')),
-                    'title': entry['title'],
-                    'url': entry['url'],
-                    'summary': summary,
-                    'source': feed_config['name'],
-                    'source_url': self.get_source_homepage(feed_config['name']),
-                    'category': feed_config['category']
-                })
-                
-                self.processed_urls.add(entry['url_hash'])
-        
+                # The same URL can appear in more than one feed; only keep the first copy
+                if entry['url_hash'] in seen_this_run:
+                    continue
+                seen_this_run.add(entry['url_hash'])
+
+                sig, previous = self.story_index.match(entry['title'], entry['summary'], feed_config['name'])
+                if previous:
+                    cluster = open_clusters.get(previous['url'])
+                    with self.cluster_lock:
+                        attached = cluster is not None and not cluster['closed']
+                        if attached:
+                            cluster['members'].append((feed_config, entry))
+                    if attached:
+                        log(f"   🔗 {feed_config['name']} also covers: {previous['title'][:60]}")
+                    else:
+                        when = "already summarized this run" if cluster is not None else "covered on an earlier run"
+                        log(f"   ↩️  Skipping {feed_config['name']} copy of: {previous['title'][:60]} ({when})")
+                        self.processed_urls.add(entry['url_hash'])
+                    continue
+
+                cluster = {'members': [(feed_config, entry)], 'closed': False}
+                if sig is not None:
+                    self.story_index.add(sig, entry['url'], entry['title'], feed_config['name'])
+                    open_clusters[entry['url']] = cluster
+                yield cluster
+
+    def summarize_clusters(self, clusters):
+        """
+        Pipeline stage: summarize a group of story clusters (one, or a batch in
+        batch mode) and checkpoint each finished record to the run journal.
+        """
+        entries = [cluster['members'][0][1] for cluster in clusters]
+        for entry in entries:
+            log(f"   Summarizing: {entry['title'][:60]}...")
+
+        summaries = self.fix_failed_summaries(entries, self.summarize_entries(entries))
+
+        records = []
+        for cluster, summary in zip(clusters, summaries):
+            # Freeze the member list: later duplicates are no longer attached
+            with self.cluster_lock:
+                cluster['closed'] = True
+                members = list(cluster['members'])
+
+            record = self.build_summary_record(members, summary)
+            url_hashes = [member['url_hash'] for _, member in members]
+            self.journal.record(record, url_hashes)
+            self.processed_urls.add_many(url_hashes)
+            records.append(record)
+
+        return records
+
+    def build_summary_record(self, members, summary):
+        """Row written to the sinks for a story; `members` are (feed_config, entry), representative first"""
+        feed_config, entry = members[0]
+        return {
+            'date': self.normalize_date(entry.get('published')),
+            'title': entry['title'],
+            'url': entry['url'],
+            'summary': summary,
+            'source': feed_config['name'],
+            'source_url': self.get_source_homepage(feed_config['name']),
+            'category': feed_config['category'],
+            'image_url': next((member.get('image_url') for _, member in members if member.get('image_url')), ''),
+            'related_sources': [
+                {'source': other_feed['name'], 'url': other['url']}
+                for other_feed, other in members[1:]
+            ],
+        }
+
+    def iter_summaries(self):
+        """
+        Stream summaries through fetch → dedupe → images → summarize.
+
+        Stages are connected by bounded queues, so the first summaries are
+        yielded while later feeds are still downloading, and a slow consumer
+        throttles fetching and LLM calls instead of buffering results.
+        Summaries left unflushed by an interrupted run are yielded first,
+        without calling the LLM again.
+        """
+        resumed = self.journal.pending()
+        if resumed:
+            log(f"♻️  Resuming {len(resumed)} summaries from an interrupted run")
+            self.processed_urls.add_many(self.journal.pending_hashes())
+            yield from resumed
+
+        log(f"Processing {len(self.rss_feeds)} RSS feeds...")
+        self.story_index.prune()
+
+        fetched = parallel_map(self.fetch_feed, self.rss_feeds, workers=self.fetcher.max_workers)
+        clusters = parallel_map(self.attach_image, self.dedupe_stories(fetched), workers=self.fetcher.max_workers)
+        for records in parallel_map(
+            self.summarize_clusters,
+            chunked(clusters, max(1, self.batch_size)),
+            workers=self.llm.max_concurrency,
+        ):
+            yield from records
+
+        self.story_index.commit()
         self.save_processed_cache()
-        return all_summaries
-    
-    def save_summaries_to_file(self, summaries, filepath='../data/news_summaries.json'):
-        """Save summaries to JSON file AND Google Sheets"""
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        existing_data = []
-        if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                existing_data = json.load(f)
-        
-        existing_data.extend(summaries)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, indent=2, ensure_ascii=False)
+        self.feed_state.save()
+
+    def process_all_feeds(self):
+        """Process all RSS feeds and return every summary as one list"""
+        return list(self.iter_summaries())
+
+    def run_pipeline(self):
+        """
+        Stream summaries to the sinks (JSON archive, Google Sheets, WordPress
+        export) in small batches as they are produced. Returns
+        (summaries, wp_posts) for the whole run.
+        """
+        summaries, wp_posts = [], []
+
+        # Deliver rows an earlier run queued while Sheets was unavailable
+        self.flush_outbox()
+
+        for batch in chunked(self.iter_summaries(), self.sink_batch_size):
+            self.save_summaries_to_file(batch)
+            wp_posts.extend(self.export_for_wordpress(batch))
+            summaries.extend(batch)
+
+        return summaries, wp_posts
+
+    def save_summaries_to_file(self, summaries, archive_dir='../data/news_summaries'):
+        """
+        Append summaries to the daily JSONL archive AND Google Sheets.
+        Sheet rows are committed to the outbox (keyed by article URL), and the
+        processed URLs and story index are saved, before the journal entries
+        are marked flushed; rows Sheets rejects stay queued for the next run.
+        """
+        archive = SummaryArchive(archive_dir, legacy_json_path='../data/news_summaries.json')
+        archive.append(summaries)
         
-        print(f"\n✅ Saved {len(summaries)} summaries to {filepath}")
+        log(f"\n✅ Saved {len(summaries)} summaries to {archive.partition_path(datetime.utcnow())}")
         
-        if self.google_sheet and summaries:
-            try:
-                rows_to_append = []
-                for summary in summaries:
-                    rows_to_append.append([
-                        # 1: date
-                        summary.get('date', ''),
-                        # 2: title
-                        summary.get('title', ''),
-                        # 3: url
-                        summary.get('url', ''),
-                        # 4: summary (we'll use the AI summary here)
-                        summary.get('summary', ''),
-                        # 5: source
-                        summary.get('source', ''),
-                        # 6: clean_summary (also AI summary for now)
-                        summary.get('summary', ''),
-                        # 7: image_url (leave blank for now)
-                        '',
-                        # 8: web_source_url (use source_url if present, else blank)
-                        summary.get('source_url', ''),
-                        # 9–12: NeedsCap, EndsWrong, TooShort, TooManySentences
-                        '', '', '', '',
-                        # 13: Category
-                        summary.get('category', ''),
-                    ])
-
-                
-                self.google_sheet.append_rows(rows_to_append)
-                print(f"✅ Appended {len(rows_to_append)} summaries to Google Sheets")
-            except Exception as e:
-                print(f"⚠️  Could not write to Google Sheets: {e}")
+        if self.sheets_enabled and summaries:
+            flags = self.check_quality([s.get('summary', '') for s in summaries]).values.tolist()
+            rows_to_append = []
+            for summary, summary_flags in zip(summaries, flags):
+                rows_to_append.append([
+                    # 1: date
+                    summary.get('date', ''),
+                    # 2: title
+                    summary.get('title', ''),
+                    # 3: url
+                    summary.get('url', ''),
+                    # 4: summary (we'll use the AI summary here)
+                    summary.get('summary', ''),
+                    # 5: source
+                    summary.get('source', ''),
+                    # 6: clean_summary (also AI summary for now)
+                    summary.get('summary', ''),
+                    # 7: image_url
+                    summary.get('image_url', ''),
+                    # 8: web_source_url (use source_url if present, else blank)
+                    summary.get('source_url', ''),
+                    # 9–12: NeedsCap, EndsWrong, TooShort, TooManySentences
+                    *summary_flags,
+                    # 13: Category
+                    summary.get('category', ''),
+                ])
+            self.outbox.enqueue(
+                sheets_target("Inoreader Articles"),
+                [(summary['url'], row) for summary, row in zip(summaries, rows_to_append)],
+            )
+
+        # Persist the processed URLs and story index before these leave the
+        # journal, so a crash after this point cannot summarize them again
+        self.story_index.commit()
+        self.save_processed_cache()
+        self.journal.mark_flushed([s['url'] for s in summaries])
+        self.journal.prune()
+        self.flush_outbox()
+
+    def flush_outbox(self):
+        """Deliver queued sheet rows"""
+        for sent, failed in self.outbox.drain().values():
+            if sent:
+                log(f"✅ Appended {sent} summaries to Google Sheets")
+            if failed:
+                log(f"⏳ {failed} summaries queued for Google Sheets; see `python outbox.py status`")
     
     def export_for_wordpress(self, summaries):
         """Format summaries for WordPress publishing"""
         wp_posts = []
         
         for item in summaries:
+            related = item.get('related_sources') or []
+            related_html = ""
+            if related:
+                links = ", ".join(
+                    '<a href="{}" target="_blank" rel="noopener">{}</a>'.format(r['url'], r['source'])
+                    for r in related
+                )
+                related_html = f"\n<p><strong>Also covered by:</strong> {links}</p>\n"
+
             html_content = f"""
 <p>{item['summary']}</p>
 
 <p><strong>Source:</strong> <a href="{item['url']}" target="_blank" rel="noopener">{item['source']}</a></p>
-
+{related_html}
 <p><em>Category: {item['category'].title()} | Published: {item['date']}</em></p>
 """
             wp_posts.append({
                 'title': item['title'],
                 'content': html_content,
                 'category': item['category'],
-                'source_url': item['url']
+                'source_url': item['url'],
+                # Pass to WordPressPublisher.queue_post(featured_image_url=...)
+                'image_url': item.get('image_url', '')
             })
         
         return wp_posts
@@ -306,28 +789,28 @@ def run_news_summarizer():
     """Main function to run news summarizer"""
     summarizer = NewsSummarizer()
     
-    summaries = summarizer.process_all_feeds()
+    summaries, wp_posts = summarizer.run_pipeline()
     
     if summaries:
-        summarizer.save_summaries_to_file(summaries)
-        wp_posts = summarizer.export_for_wordpress(summaries)
-        
-        print(f"\n📊 Summary Statistics:")
-        print(f"   Total summaries: {len(summaries)}")
-        print(f"   Ready for WordPress: {len(wp_posts)}")
-        
-        return summaries, wp_posts
+        log(f"\n📊 Summary Statistics:")
+        log(f"   Total summaries: {len(summaries)}")
+        log(f"   Ready for WordPress: {len(wp_posts)}")
+        cache_stats = summarizer.llm_cache.stats()
+        log(f"   LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']}% hit rate)")
+        usage = summarizer.llm.usage
+        log(f"   LLM tokens: {usage['input_tokens']} in, {usage['output_tokens']} out over {usage['calls']} calls")
     else:
-        print("\n⚠️  No new articles to process")
-        return [], []
+        log("\n⚠️  No new articles to process")
+
+    return summaries, wp_posts
 
 
 if __name__ == '__main__':
-    print("News Summarizer - Daily Automation")
-    print("=" * 50)
+    log("News Summarizer - Daily Automation")
+    log("=" * 50)
     
     if not os.getenv('OPENAI_API_KEY'):
-        print("\n⚠️  Warning: OPENAI_API_KEY not set")
-        print("   AI summarization will use fallback method")
+        log("\n⚠️  Warning: OPENAI_API_KEY not set")
+        log("   AI summarization will use fallback method")
     
     run_news_summarizer()
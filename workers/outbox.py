@@ -0,0 +1,318 @@
+"""
+Durable outbox for writes to external services (Google Sheets, WordPress).
+
+Writes are committed to a local SQLite queue first and delivered by
+drain() in batches, so an API outage delays them instead of losing them.
+
+Inspect or manage the queue from workers/:
+
+    python outbox.py status
+    python outbox.py list --status dead
+    python outbox.py retry
+    python outbox.py drain
+    python outbox.py prune --days 30
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from dotenv import load_dotenv
+from gspread.utils import rowcol_to_a1
+
+load_dotenv()
+
+OutboxEntry = namedtuple("OutboxEntry", "id key payload attempts")
+
+SHEETS_PREFIX = "sheets:"
+WORDPRESS_POSTS = "wordpress:posts"
+
+# Column holding each sheet's idempotency key (url for articles, idea_title for ideas)
+SHEET_KEY_COLUMNS = {
+    "Inoreader Articles": 3,
+    "Content_Backlog": 4,
+}
+
+
+class Outbox:
+    """
+    SQLite-backed queue of outbound writes.
+
+    Each write is stored under (target, key), where key is an idempotency
+    key such as the article URL: enqueueing the same key twice is a no-op,
+    including after it was delivered, so a rerun cannot write the same row
+    twice. Delivered entries are kept for `keep_days`; drain() prunes older
+    ones.
+
+    drain() hands due entries to the handler registered for their target,
+    up to `batch_size` at a time. A handler takes a list of OutboxEntry and
+    returns {key: error} for entries that failed individually; raising
+    fails the whole batch. Failed entries are retried with exponential
+    backoff, and after `max_attempts` they are parked as "dead" until
+    retried by hand (`python outbox.py retry`). Handlers see each entry's
+    previous attempts, so on a retry they can check whether an earlier
+    attempt landed despite the error before writing again.
+    """
+
+    def __init__(self, path="../data/outbox.sqlite", max_attempts=8, base_delay=30.0, max_delay=3600.0,
+                 keep_days=30):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.keep_days = keep_days
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.handlers = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY, target TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, last_error TEXT, created_at REAL NOT NULL, sent_at REAL, "
+            "UNIQUE (target, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, target, next_attempt_at)")
+        self._conn.commit()
+
+    def register(self, target, handler, batch_size=100):
+        self.handlers[target] = (handler, batch_size)
+
+    def enqueue(self, target, items):
+        """
+        Queue (key, payload) pairs for `target`; payloads must be JSON-serializable.
+        Committed before returning. Returns the number of new entries.
+        """
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (target, key, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(target, str(key), json.dumps(payload, ensure_ascii=False), now, now) for key, payload in items],
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def _due(self, target, limit):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND target = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (target, time.time(), limit),
+            ).fetchall()
+        return [OutboxEntry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def _settle(self, entries, errors):
+        now = time.time()
+        sent, failed = [], []
+        for entry in entries:
+            if entry.key not in errors:
+                sent.append((now, entry.id))
+                continue
+            attempts = entry.attempts + 1
+            status = "dead" if attempts >= self.max_attempts else "pending"
+            delay = min(self.max_delay, self.base_delay * (2 ** entry.attempts))
+            failed.append((status, attempts, now + delay, str(errors[entry.key])[:500], entry.id))
+
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?", sent)
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?", failed
+            )
+            self._conn.commit()
+        return len(sent), len(failed)
+
+    def drain(self, targets=None):
+        """
+        Deliver due entries for registered targets (all of them by default).
+        A target stops at its first failed batch so an outage costs one
+        request, not one per batch. Delivered entries older than keep_days
+        are pruned afterwards. Returns {target: (sent, failed)}.
+        """
+        results = {}
+        for target in targets or list(self.handlers):
+            if target not in self.handlers:
+                continue
+            handler, batch_size = self.handlers[target]
+            sent = failed = 0
+            while True:
+                entries = self._due(target, batch_size)
+                if not entries:
+                    break
+                try:
+                    errors = handler(entries) or {}
+                except Exception as e:
+                    errors = {entry.key: e for entry in entries}
+                batch_sent, batch_failed = self._settle(entries, errors)
+                sent += batch_sent
+                failed += batch_failed
+                if batch_failed:
+                    print(f"⚠️  Outbox: {batch_failed} {target} write(s) failed: {next(iter(errors.values()))}")
+                    break
+            if sent or failed:
+                results[target] = (sent, failed)
+        self.prune()
+        return results
+
+    def counts(self):
+        """{target: {status: count}}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT target, status, COUNT(*) FROM outbox GROUP BY target, status").fetchall()
+        counts = {}
+        for target, status, count in rows:
+            counts.setdefault(target, {})[status] = count
+        return counts
+
+    def entries(self, status=None, target=None, limit=50):
+        """Newest entries as dicts, optionally filtered by status and target."""
+        sql = "SELECT id, target, key, status, attempts, next_attempt_at, last_error, created_at FROM outbox"
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if target:
+            where.append("target = ?")
+            params.append(target)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        columns = ("id", "target", "key", "status", "attempts", "next_attempt_at", "last_error", "created_at")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def retry(self, target=None):
+        """Make dead (and backing-off) entries due now. Returns the number reset."""
+        sql = "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status != 'sent'"
+        params = [time.time()]
+        if target:
+            sql += " AND target = ?"
+            params.append(target)
+        with self._lock:
+            reset = self._conn.execute(sql, params).rowcount
+            self._conn.commit()
+        return reset
+
+    def prune(self, keep_days=None):
+        """Forget delivered entries older than keep_days (default self.keep_days). Returns the number removed."""
+        if keep_days is None:
+            keep_days = self.keep_days
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?", (time.time() - keep_days * 86400,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def sheets_target(worksheet_title):
+    return SHEETS_PREFIX + worksheet_title
+
+
+def sheets_append_handler(worksheet, key_column):
+    """
+    Handler appending each batch to `worksheet` in one append_rows call.
+    Payloads are rows; `key_column` (1-based) holds the idempotency key.
+    If any entry was attempted before, the key column is read first and
+    rows that already reached the sheet are not appended again.
+    """
+    def handle(entries):
+        if any(entry.attempts for entry in entries):
+            start = rowcol_to_a1(2, key_column)
+            column = worksheet.get(f"{start}:{start.rstrip('0123456789')}")
+            present = {row[0] for row in column if row}
+            entries = [entry for entry in entries if entry.key not in present]
+        if entries:
+            worksheet.append_rows([entry.payload for entry in entries])
+        return {}
+    return handle
+
+
+def wordpress_post_handler(publisher):
+    """
+    Handler creating one WordPress post per entry; payloads are
+    WordPressPublisher.create_post keyword arguments.
+    """
+    def handle(entries):
+        errors = {}
+        for entry in entries:
+            if entry.attempts and publisher.find_post_by_title(entry.payload["title"]):
+                continue
+            result = publisher.create_post(**entry.payload)
+            if not result.get("success"):
+                errors[entry.key] = result.get("error")
+        return errors
+    return handle
+
+
+def register_default_handlers(outbox, targets):
+    """Register handlers for the given targets using the shared Sheets gateway and WordPressPublisher."""
+    from sheets_gateway import get_gateway
+    from wp_publish import WordPressPublisher
+
+    for target in targets:
+        if target.startswith(SHEETS_PREFIX):
+            gateway = get_gateway()
+            if gateway:
+                title = target[len(SHEETS_PREFIX):]
+                outbox.register(target, sheets_append_handler(gateway.worksheet(title), SHEET_KEY_COLUMNS[title]))
+        elif target == WORDPRESS_POSTS:
+            outbox.register(target, wordpress_post_handler(WordPressPublisher()), batch_size=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="../data/outbox.sqlite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="entry counts per target and status")
+    list_parser = commands.add_parser("list", help="newest entries")
+    list_parser.add_argument("--status", choices=("pending", "sent", "dead"))
+    list_parser.add_argument("--target")
+    list_parser.add_argument("--limit", type=int, default=20)
+    retry_parser = commands.add_parser("retry", help="make failed entries due now")
+    retry_parser.add_argument("--target")
+    drain_parser = commands.add_parser("drain", help="deliver due entries now")
+    drain_parser.add_argument("--target")
+    prune_parser = commands.add_parser("prune", help="forget delivered entries older than --days")
+    prune_parser.add_argument("--days", type=float, default=float(os.getenv("OUTBOX_KEEP_DAYS", 30)))
+    args = parser.parse_args()
+
+    outbox = Outbox(args.path)
+    if args.command == "status":
+        counts = outbox.counts()
+        if not counts:
+            print("Outbox is empty")
+        for target, by_status in sorted(counts.items()):
+            print(f"{target}: " + ", ".join(f"{status}={n}" for status, n in sorted(by_status.items())))
+    elif args.command == "list":
+        for entry in outbox.entries(args.status, args.target, args.limit):
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"]))
+            line = f"#{entry['id']} {created} {entry['target']} [{entry['status']}, {entry['attempts']} attempts] {entry['key']}"
+            if entry["last_error"]:
+                line += f"\n    last error: {entry['last_error']}"
+            print(line)
+    elif args.command == "retry":
+        print(f"🔁 {outbox.retry(args.target)} entries due for retry")
+    elif args.command == "drain":
+        targets = [args.target] if args.target else list(outbox.counts())
+        register_default_handlers(outbox, targets)
+        results = outbox.drain(targets)
+        for target, (sent, failed) in results.items():
+            print(f"✅ {target}: {sent} sent, {failed} failed")
+        if not results:
+            print("Nothing due")
+    elif args.command == "prune":
+        print(f"🧹 Pruned {outbox.prune(args.days)} delivered entries older than {args.days:g} days")
+    outbox.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import queue
+import threading
+
+_DONE = object()
+
+_log_lock = threading.Lock()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def log(message=""):
+    """
+    print() for output that may come from pipeline threads: each message is
+    written under one lock, so lines from concurrent stages never interleave.
+    """
+    with _log_lock:
+        print(message)
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once the consumer has gone away."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def parallel_map(func, iterable, workers=4, buffer=None):
+    """
+    Lazily apply `func` to items pulled from `iterable` on `workers` threads,
+    yielding results as they complete (not in input order).
+
+    Both the input and output sides are bounded queues of size `buffer`, so a
+    slow downstream stage stops upstream stages from pulling more work; memory
+    stays bounded however many items flow through. An exception raised by
+    `func` or by `iterable` is re-raised in the consumer.
+    """
+    workers = max(1, int(workers))
+    buffer = workers if buffer is None else max(1, int(buffer))
+    in_q = queue.Queue(maxsize=buffer)
+    out_q = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+
+    def feed():
+        try:
+            for item in iterable:
+                if not _put(in_q, item, stop):
+                    return
+        except BaseException as e:
+            _put(out_q, _Failure(e), stop)
+        finally:
+            for _ in range(workers):
+                _put(in_q, _DONE, stop)
+
+    def work():
+        while not stop.is_set():
+            try:
+                item = in_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                _put(out_q, _DONE, stop)
+                return
+            try:
+                result = func(item)
+            except BaseException as e:
+                result = _Failure(e)
+            if not _put(out_q, result, stop):
+                return
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads.extend(threading.Thread(target=work, daemon=True) for _ in range(workers))
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    try:
+        while finished < workers:
+            result = out_q.get()
+            if result is _DONE:
+                finished += 1
+            elif isinstance(result, _Failure):
+                raise result.error
+            else:
+                yield result
+    finally:
+        stop.set()
+
+
+def chunked(iterable, size):
+    """Group a stream into lists of up to `size` items without reading ahead."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
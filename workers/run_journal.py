@@ -0,0 +1,74 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class RunJournal:
+    """
+    Durable per-article checkpoint journal for the news summarizer.
+
+    Every summary is committed here the moment the LLM returns it, together
+    with the URL hashes of all feed entries it covers. Entries stay pending
+    until the sinks (JSON archive, Sheets) have accepted them, so a run that
+    dies midway can be resumed: pending summaries are flushed again without
+    another LLM call, and their URLs are treated as already processed.
+    """
+
+    def __init__(self, path="../data/summarizer_journal.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "url TEXT PRIMARY KEY, summary TEXT NOT NULL, url_hashes TEXT NOT NULL, "
+            "created_at REAL NOT NULL, flushed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_flushed ON journal(flushed_at)")
+        self._conn.commit()
+
+    def record(self, summary, url_hashes):
+        """Checkpoint one finished summary; committed before returning."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal (url, summary, url_hashes, created_at, flushed_at) "
+                "VALUES (?, ?, ?, ?, NULL)",
+                (summary["url"], json.dumps(summary, ensure_ascii=False), json.dumps(list(url_hashes)), time.time()),
+            )
+            self._conn.commit()
+
+    def pending(self):
+        """Summaries not yet flushed to the sinks, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT summary FROM journal WHERE flushed_at IS NULL ORDER BY created_at"
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def pending_hashes(self):
+        """URL hashes covered by pending summaries."""
+        with self._lock:
+            rows = self._conn.execute("SELECT url_hashes FROM journal WHERE flushed_at IS NULL").fetchall()
+        return [h for row in rows for h in json.loads(row[0])]
+
+    def mark_flushed(self, urls):
+        with self._lock:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE journal SET flushed_at = ? WHERE url = ?",
+                [(now, url) for url in urls],
+            )
+            self._conn.commit()
+
+    def prune(self, keep_days=7):
+        """Forget flushed entries older than keep_days. Returns the number removed."""
+        cutoff = time.time() - keep_days * 86400
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM journal WHERE flushed_at IS NOT NULL AND flushed_at < ?", (cutoff,)
+            ).rowcount
+            self._conn.commit()
+        return removed
@@ -0,0 +1,264 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import gspread
+from google.oauth2.service_account import Credentials
+
+from pipeline import log
+
+SPREADSHEET_NAME = "RobLoTech_Content_Ideas"
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503}
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in SQLite, so every worker process on the
+    machine draws from the same per-minute budget. A 429 from any process
+    pauses all of them until `paused_until`.
+    """
+
+    def __init__(self, path, name, per_minute):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, paused_until REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated, paused_until) VALUES (?, ?, ?, 0)",
+            (name, self.capacity, time.time()),
+        )
+
+    def acquire(self, amount=1):
+        """Block until `amount` tokens are available (and no pause is in effect), then take them."""
+        while True:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    tokens, updated, paused_until = self._conn.execute(
+                        "SELECT tokens, updated, paused_until FROM buckets WHERE name = ?", (self.name,)
+                    ).fetchone()
+                    now = time.time()
+                    tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+                    if now >= paused_until and tokens >= amount:
+                        tokens -= amount
+                        wait = 0
+                    else:
+                        wait = max(paused_until - now, (amount - tokens) / self.rate)
+                    self._conn.execute(
+                        "UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name)
+                    )
+                finally:
+                    self._conn.execute("COMMIT")
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE buckets SET paused_until = MAX(paused_until, ?) WHERE name = ?",
+                (time.time() + seconds, self.name),
+            )
+
+
+class GatedWorksheet:
+    """
+    gspread Worksheet wrapper that sends every API call through the
+    gateway's quota buckets. Reads are memoized for `cache_seconds`, keyed
+    on the range and call options, so asking twice for the same range costs
+    one request. A write through this handle or invalidate() drops the memo;
+    the TTL bounds how stale rows appended by other processes can get.
+    """
+
+    def __init__(self, gateway, worksheet, cache_seconds=30.0):
+        self._gateway = gateway
+        self._ws = worksheet
+        self.cache_seconds = cache_seconds
+        self._reads = {}
+
+    @property
+    def id(self):
+        return self._ws.id
+
+    @property
+    def title(self):
+        return self._ws.title
+
+    @property
+    def spreadsheet(self):
+        return self._ws.spreadsheet
+
+    @property
+    def row_count(self):
+        return self._ws.row_count
+
+    @staticmethod
+    def _key(*parts, **kwargs):
+        return parts + (repr(sorted(kwargs.items())),)
+
+    def _cached(self, key):
+        """(True, values) if `key` was read less than cache_seconds ago, else (False, None)."""
+        hit = self._reads.get(key)
+        if hit is not None and time.monotonic() - hit[0] < self.cache_seconds:
+            return True, hit[1]
+        return False, None
+
+    def _read(self, key, func, *args, **kwargs):
+        found, values = self._cached(key)
+        if not found:
+            values = self._gateway.call("read", func, *args, **kwargs)
+            self._reads[key] = (time.monotonic(), values)
+        return values
+
+    def _write(self, func, *args, **kwargs):
+        self.invalidate()
+        return self._gateway.call("write", func, *args, **kwargs)
+
+    def invalidate(self):
+        """Forget memoized reads, e.g. after another process has written to the sheet."""
+        self._reads.clear()
+
+    def get(self, range_name=None, **kwargs):
+        return self._read(self._key("get", range_name, **kwargs), self._ws.get, range_name, **kwargs)
+
+    def batch_get(self, ranges, **kwargs):
+        """Several ranges in a single request; each range is also memoized for later get() calls."""
+        ranges = list(ranges)
+        missing = [r for r in ranges if not self._cached(self._key("get", r, **kwargs))[0]]
+        if missing:
+            now = time.monotonic()
+            for range_name, values in zip(missing, self._gateway.call("read", self._ws.batch_get, missing, **kwargs)):
+                self._reads[self._key("get", range_name, **kwargs)] = (now, values)
+        return [self._reads[self._key("get", r, **kwargs)][1] for r in ranges]
+
+    def row_values(self, row, **kwargs):
+        return self._read(self._key("row", row, **kwargs), self._ws.row_values, row, **kwargs)
+
+    def get_all_records(self, **kwargs):
+        return self._read(self._key("records", **kwargs), self._ws.get_all_records, **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        """Append many rows in one request."""
+        return self._write(self._ws.append_rows, values, **kwargs)
+
+    def batch_update(self, data, **kwargs):
+        """Write many ranges in one request; `data` is [{'range': 'A1:B2', 'values': [[...]]}, ...]."""
+        return self._write(self._ws.batch_update, data, **kwargs)
+
+    def update(self, values, range_name, **kwargs):
+        return self.batch_update([{"range": range_name, "values": values}], **kwargs)
+
+
+class SheetsGateway:
+    """
+    The one place workers talk to Google Sheets.
+
+    - Authorizes once and caches spreadsheet and worksheet handles, so a
+      worksheet is opened once per process, not once per function call.
+    - Every request takes a token from a read or write bucket shared by all
+      worker processes (SHEETS_READS_PER_MINUTE / SHEETS_WRITES_PER_MINUTE,
+      the per-user Sheets API quotas).
+    - Worksheet reads are memoized for SHEETS_READ_CACHE_SECONDS.
+    - 429 and 5xx responses are retried with exponential backoff and full
+      jitter; a 429 also pauses every process sharing the bucket.
+    """
+
+    def __init__(self, creds_json=None, quota_path="../data/sheets_quota.sqlite", reads_per_minute=60,
+                 writes_per_minute=60, max_retries=5, base_delay=2.0, max_delay=64.0, read_cache_seconds=30.0):
+        self.creds_json = creds_json
+        self.read_cache_seconds = read_cache_seconds
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.buckets = {
+            "read": SharedTokenBucket(quota_path, "sheets_read", reads_per_minute),
+            "write": SharedTokenBucket(quota_path, "sheets_write", writes_per_minute),
+        }
+        self._client = None
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            creds = Credentials.from_service_account_info(json.loads(self.creds_json), scopes=SCOPES)
+            self._client = gspread.authorize(creds)
+        return self._client
+
+    def call(self, kind, func, *args, **kwargs):
+        """Run one Sheets API call under the `kind` ("read"/"write") quota, retrying 429/5xx."""
+        bucket = self.buckets[kind]
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                return func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = getattr(e, "code", None)
+                if status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                if status == 429:
+                    # Per-minute quotas refill on a rolling window; make every worker back off
+                    delay = max(delay, self.base_delay * (2 ** attempt))
+                    bucket.pause(delay)
+                log(f"   ⏳ Sheets {kind} failed ({status}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def spreadsheet(self, name=SPREADSHEET_NAME):
+        with self._lock:
+            if name not in self._spreadsheets:
+                self._spreadsheets[name] = self.call("read", self.client.open, name)
+            return self._spreadsheets[name]
+
+    def worksheet(self, title, spreadsheet_name=SPREADSHEET_NAME):
+        """Cached, quota-gated handle for a worksheet."""
+        spreadsheet = self.spreadsheet(spreadsheet_name)
+        key = (spreadsheet_name, title)
+        with self._lock:
+            if key not in self._worksheets:
+                self._worksheets[key] = GatedWorksheet(
+                    self, self.call("read", spreadsheet.worksheet, title), self.read_cache_seconds
+                )
+            return self._worksheets[key]
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """
+    The process-wide SheetsGateway, or None if GOOGLE_SERVICE_ACCOUNT_JSON
+    is not set.
+    """
+    global _gateway
+    creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+    if not creds_json:
+        return None
+
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = SheetsGateway(
+                creds_json,
+                reads_per_minute=int(os.getenv("SHEETS_READS_PER_MINUTE", 60)),
+                writes_per_minute=int(os.getenv("SHEETS_WRITES_PER_MINUTE", 60)),
+                read_cache_seconds=float(os.getenv("SHEETS_READ_CACHE_SECONDS", 30)),
+            )
+        return _gateway
@@ -1,4 +1,4 @@
-import requests
+import os
 import json
 import feedparser
 from bs4 import BeautifulSoup
@@ -6,40 +6,60 @@ from datetime import datetime
 from urllib.parse import urljoin, urlparse
 import re
 from collections import defaultdict
+from dotenv import load_dotenv
+
+from pipeline import log, parallel_map
+from site_crawler import SiteCrawler
+
+load_dotenv()
 
 class SiteAuditor:
-    def __init__(self, site_url):
+    def __init__(self, site_url, concurrency=None, max_pages=None):
         self.site_url = site_url
         self.sitemap_data = []
         self.content_map = []
         self.internal_links = defaultdict(list)
+        # None audits every page in the sitemap
+        if max_pages is None and os.getenv('SITE_AUDIT_MAX_PAGES'):
+            max_pages = int(os.getenv('SITE_AUDIT_MAX_PAGES'))
+        self.max_pages = max_pages
+        self.crawler = SiteCrawler(
+            site_url,
+            concurrency=concurrency or int(os.getenv('SITE_AUDIT_CONCURRENCY', 8)),
+            timeout=float(os.getenv('SITE_AUDIT_TIMEOUT', 10)),
+            min_delay=float(os.getenv('SITE_AUDIT_MIN_DELAY', 0)),
+        )
         
     def fetch_sitemap(self):
-        """Fetch and parse sitemap.xml"""
+        """Fetch and parse sitemap.xml (post sitemaps are fetched concurrently)"""
         try:
             sitemap_url = urljoin(self.site_url, '/sitemap_index.xml')
-            response = requests.get(sitemap_url, timeout=10)
-            response.raise_for_status()
+            response = self.crawler.fetch(sitemap_url)
             
             soup = BeautifulSoup(response.content, 'xml')
             sitemaps = soup.find_all('sitemap')
+            post_sitemaps = [
+                loc.text for loc in (sitemap.find('loc') for sitemap in sitemaps)
+                if loc and 'post-sitemap' in loc.text
+            ]
             
-            all_urls = []
-            for sitemap in sitemaps:
-                loc = sitemap.find('loc')
-                if loc and 'post-sitemap' in loc.text:
-                    post_response = requests.get(loc.text, timeout=10)
-                    post_soup = BeautifulSoup(post_response.content, 'xml')
-                    urls = post_soup.find_all('url')
-                    
-                    for url in urls:
-                        loc_tag = url.find('loc')
-                        lastmod_tag = url.find('lastmod')
-                        if loc_tag:
-                            all_urls.append({
-                                'url': loc_tag.text,
-                                'lastmod': lastmod_tag.text if lastmod_tag else None
-                            })
+            def parse_sitemap(indexed):
+                idx, loc = indexed
+                post_soup = BeautifulSoup(self.crawler.fetch(loc).content, 'xml')
+                urls = []
+                for url in post_soup.find_all('url'):
+                    loc_tag = url.find('loc')
+                    lastmod_tag = url.find('lastmod')
+                    if loc_tag:
+                        urls.append({
+                            'url': loc_tag.text,
+                            'lastmod': lastmod_tag.text if lastmod_tag else None
+                        })
+                return idx, urls
+            
+            # Keep sitemap order although sitemaps finish in any order
+            results = sorted(parallel_map(parse_sitemap, enumerate(post_sitemaps), workers=self.crawler.concurrency))
+            all_urls = [url for _, urls in results for url in urls]
             
             self.sitemap_data = all_urls
             return all_urls
@@ -51,49 +71,50 @@ class SiteAuditor:
     def analyze_content(self, url):
         """Analyze a single page for content metrics"""
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            title = soup.find('title')
-            title_text = title.text.strip() if title else ''
-            
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            meta_description = meta_desc.get('content', '') if meta_desc else ''
-            
-            h1_tags = [h1.text.strip() for h1 in soup.find_all('h1')]
-            h2_tags = [h2.text.strip() for h2 in soup.find_all('h2')]
-            
-            article = soup.find('article') or soup.find('main') or soup.find('body')
-            if article:
-                text_content = article.get_text(separator=' ', strip=True)
-                word_count = len(text_content.split())
-            else:
-                word_count = 0
-            
-            internal_links = []
-            for link in soup.find_all('a', href=True):
-                href = link.get('href')
-                if href and self.site_url in href:
-                    internal_links.append(href)
-            
-            target_keywords = self.extract_keywords(title_text, h1_tags, h2_tags)
-            
-            return {
-                'url': url,
-                'title': title_text,
-                'meta_description': meta_description,
-                'h1_tags': h1_tags,
-                'h2_tags': h2_tags,
-                'word_count': word_count,
-                'internal_links': len(internal_links),
-                'target_keywords': target_keywords
-            }
-            
+            return self.parse_page(url, self.crawler.fetch(url))
         except Exception as e:
             print(f"Error analyzing {url}: {e}")
             return None
     
+    def parse_page(self, url, response):
+        """Content metrics for a fetched page"""
+        soup = BeautifulSoup(response.content, 'html.parser')
+        
+        title = soup.find('title')
+        title_text = title.text.strip() if title else ''
+        
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        meta_description = meta_desc.get('content', '') if meta_desc else ''
+        
+        h1_tags = [h1.text.strip() for h1 in soup.find_all('h1')]
+        h2_tags = [h2.text.strip() for h2 in soup.find_all('h2')]
+        
+        article = soup.find('article') or soup.find('main') or soup.find('body')
+        if article:
+            text_content = article.get_text(separator=' ', strip=True)
+            word_count = len(text_content.split())
+        else:
+            word_count = 0
+        
+        internal_links = []
+        for link in soup.find_all('a', href=True):
+            href = link.get('href')
+            if href and self.site_url in href:
+                internal_links.append(href)
+        
+        target_keywords = self.extract_keywords(title_text, h1_tags, h2_tags)
+        
+        return {
+            'url': url,
+            'title': title_text,
+            'meta_description': meta_description,
+            'h1_tags': h1_tags,
+            'h2_tags': h2_tags,
+            'word_count': word_count,
+            'internal_links': len(internal_links),
+            'target_keywords': target_keywords
+        }
+    
     def extract_keywords(self, title, h1_tags, h2_tags):
         """Extract potential target keywords from title and headings"""
         all_text = ' '.join([title] + h1_tags + h2_tags).lower()
@@ -209,13 +230,23 @@ class SiteAuditor:
         print("Fetching sitemap...")
         self.fetch_sitemap()
         
-        print(f"Analyzing {len(self.sitemap_data)} pages...")
-        for idx, page_data in enumerate(self.sitemap_data[:15], 1):
-            print(f"Analyzing page {idx}/15: {page_data['url']}")
-            content_data = self.analyze_content(page_data['url'])
+        pages = self.sitemap_data[:self.max_pages] if self.max_pages else self.sitemap_data
+        lastmods = {page['url']: page['lastmod'] for page in pages}
+        order = {page['url']: idx for idx, page in enumerate(pages)}
+        
+        print(f"Analyzing {len(order)} pages ({self.crawler.concurrency} at a time)...")
+        started = datetime.now()
+        done = 0
+        for url, content_data in self.crawler.crawl(order, self.parse_page):
+            done += 1
+            if done % 50 == 0:
+                log(f"Analyzed {done}/{len(order)} pages")
             if content_data:
-                content_data['lastmod'] = page_data['lastmod']
+                content_data['lastmod'] = lastmods[url]
                 self.content_map.append(content_data)
+        # Pages finish in any order; report them in sitemap order
+        self.content_map.sort(key=lambda page: order[page['url']])
+        print(f"Crawled {len(self.content_map)} pages in {(datetime.now() - started).total_seconds():.0f}s")
         
         print("Performing SEO gap analysis...")
         seo_gaps = self.perform_seo_gap_analysis()
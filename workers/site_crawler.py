@@ -0,0 +1,150 @@
+import threading
+import time
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from feed_fetcher import DEFAULT_USER_AGENT
+from pipeline import log, parallel_map
+
+
+class SiteCrawler:
+    """
+    Polite, concurrent page fetcher for auditing one site.
+
+    - One keep-alive session whose connection pool matches `concurrency`,
+      so pages reuse connections instead of opening one each.
+    - robots.txt is read once, on first use; disallowed URLs are skipped,
+      and its Crawl-delay (or Request-rate) spaces requests out across all
+      threads. `min_delay` sets a floor on that spacing. As in
+      urllib.robotparser, a 401/403 for robots.txt disallows everything and
+      any other 4xx allows everything.
+    - 429/5xx responses are retried with backoff, honouring Retry-After.
+    """
+
+    def __init__(self, site_url, concurrency=8, timeout=10, min_delay=0.0, respect_robots=True,
+                 user_agent=DEFAULT_USER_AGENT, retries=3):
+        self.site_url = site_url
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.min_delay = float(min_delay)
+        self.respect_robots = respect_robots
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+        self._robots = None
+        self._delay = None
+        self._robots_lock = threading.Lock()
+        self._pace_lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def _ensure_robots(self):
+        """Fetch robots.txt and settle the request spacing, once, on first use."""
+        with self._robots_lock:
+            if self._delay is None:
+                self._robots = self._load_robots() if self.respect_robots else None
+                self._delay = max(self.min_delay, self._robots_delay())
+
+    @property
+    def robots(self):
+        self._ensure_robots()
+        return self._robots
+
+    @property
+    def delay(self):
+        self._ensure_robots()
+        return self._delay
+
+    def _load_robots(self):
+        """
+        Parse robots.txt via the pooled session; None (allow all) if it is
+        missing or unreadable, a disallow-all parser if access is denied.
+        """
+        robots_url = urljoin(self.site_url, "/robots.txt")
+        try:
+            response = self.session.get(robots_url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Could not read {robots_url}: {e}; crawling without robots rules")
+            return None
+        parser = RobotFileParser(robots_url)
+        if response.status_code in (401, 403):
+            print(f"⚠️  {robots_url} returned {response.status_code}; treating the whole site as disallowed")
+            parser.disallow_all = True
+            return parser
+        if response.status_code >= 400:
+            return None
+
+        parser.parse(response.text.splitlines())
+        return parser
+
+    def _robots_delay(self):
+        if self._robots is None:
+            return 0.0
+        delay = self._robots.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = self._robots.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return 0.0
+
+    def allowed(self, url):
+        return self.robots is None or self.robots.can_fetch(self.user_agent, url)
+
+    def _wait_turn(self):
+        """Reserve the next request slot, `delay` seconds after the previous one."""
+        if not self.delay:
+            return
+        with self._pace_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request_at)
+            self._next_request_at = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def fetch(self, url):
+        """GET `url` (paced, retried); returns the response or raises on HTTP errors."""
+        self._wait_turn()
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def crawl(self, urls, parse):
+        """
+        Fetch `urls` on `concurrency` threads and yield (url, parse(url, response))
+        as pages complete; URLs robots.txt disallows are skipped. Pages that
+        fail are yielded as (url, None) after printing the error.
+        """
+        def visit(url):
+            try:
+                return url, parse(url, self.fetch(url))
+            except Exception as e:
+                log(f"Error analyzing {url}: {e}")
+                return url, None
+
+        urls = list(urls)
+        allowed = [url for url in urls if self.allowed(url)]
+        skipped = len(urls) - len(allowed)
+        if skipped:
+            print(f"↩️  Skipping {skipped} pages disallowed by robots.txt")
+        if self.delay:
+            print(f"⏳ Spacing requests {self.delay:g}s apart (~{self.delay * len(allowed) / 60:.1f} min "
+                  f"for {len(allowed)} pages)")
+
+        yield from parallel_map(visit, allowed, workers=self.concurrency)
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+TAG_RE = re.compile(r"<[^>]+>")
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9\-]*[a-z0-9]")
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "are", "was", "were", "has", "have",
+    "had", "its", "it's", "into", "over", "after", "before", "about", "their", "they", "them",
+    "than", "then", "been", "being", "will", "would", "could", "should", "can", "may", "not",
+    "but", "also", "more", "most", "new", "now", "how", "what", "why", "when", "who", "which",
+    "you", "your", "our", "all", "any", "out", "via", "per", "says", "said", "post", "appeared",
+    "first", "read", "article", "continue", "reading",
+}
+
+
+def story_tokens(text):
+    """Lowercased content words from a title + summary, HTML stripped."""
+    text = TAG_RE.sub(" ", text or "").lower()
+    return {t for t in TOKEN_RE.findall(text) if len(t) > 2 and t not in STOPWORDS}
+
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """MinHash signatures with `num_perm` universal hash permutations (fixed seed, so stable across runs)."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, tokens):
+        if not tokens:
+            return None
+        hashed = [_token_hash(t) for t in tokens]
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashed)
+            for a, b in self.params
+        )
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two token sets."""
+    equal = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return equal / len(sig_a)
+
+
+def band_buckets(sig, bands, rows):
+    """(band, bucket) LSH keys of a signature split into `bands` bands of `rows` values."""
+    for band in range(bands):
+        chunk = sig[band * rows:(band + 1) * rows]
+        yield band, hashlib.blake2b(struct.pack(f"<{rows}Q", *chunk), digest_size=8).digest()
+
+
+def pack_signature(sig):
+    """Signature as a BLOB (None stays None)."""
+    return struct.pack(f"<{len(sig)}Q", *sig) if sig else None
+
+
+def unpack_signature(blob):
+    return struct.unpack(f"<{len(blob) // 8}Q", blob) if blob else None
+
+
+class StoryIndex:
+    """
+    Near-duplicate story detector using MinHash + LSH over title and summary.
+
+    Every representative story is added to a SQLite index (signatures plus
+    LSH band buckets) as soon as it is accepted and kept for `ttl_days`, so
+    later copies, in the same run or on later days, are caught with an
+    indexed bucket lookup instead of a scan. Stories from the same source
+    never match each other: an outlet does not cover one story twice, and
+    its own entries share boilerplate (bylines, "appeared first on" footers).
+
+    Rewrites of one story by different outlets share well under half their
+    words, so the LSH is tuned loose (64 bands of 2 rows) to surface
+    candidates, which are then confirmed against `threshold`.
+    """
+
+    def __init__(self, path, threshold=0.45, num_perm=128, bands=64, ttl_days=7):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl_days = ttl_days
+        self.hasher = MinHasher(num_perm)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stories ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL, title TEXT, source TEXT, "
+            "signature BLOB NOT NULL, seen_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_buckets ("
+            "band INTEGER NOT NULL, bucket BLOB NOT NULL, story_id INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh_buckets(band, bucket)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_story ON lsh_buckets(story_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_stories_seen ON stories(seen_at)")
+        self._conn.commit()
+
+    def signature(self, title, summary):
+        return self.hasher.signature(story_tokens(f"{title} {summary}"))
+
+    def find_previous(self, sig, source=None):
+        """Best-matching indexed story from a different source as a dict, or None."""
+        with self._lock:
+            candidate_ids = set()
+            for band, bucket in band_buckets(sig, self.bands, self.rows):
+                rows = self._conn.execute(
+                    "SELECT story_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+                candidate_ids.update(r[0] for r in rows)
+
+            candidates = [
+                self._conn.execute(
+                    "SELECT url, title, source, signature FROM stories WHERE id = ?", (story_id,)
+                ).fetchone()
+                for story_id in candidate_ids
+            ]
+
+        best = None
+        for row in candidates:
+            if row is None or (source and row[2] == source):
+                continue
+            score = similarity(sig, unpack_signature(row[3]))
+            if score >= self.threshold and (best is None or score > best["similarity"]):
+                best = {"url": row[0], "title": row[1], "source": row[2], "similarity": score}
+        return best
+
+    def add(self, sig, url, title, source):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO stories (url, title, source, signature, seen_at) VALUES (?, ?, ?, ?, ?)",
+                (url, title, source, pack_signature(sig), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO lsh_buckets (band, bucket, story_id) VALUES (?, ?, ?)",
+                [(band, bucket, cursor.lastrowid) for band, bucket in band_buckets(sig, self.bands, self.rows)],
+            )
+
+    def match(self, title, summary, source=None):
+        """
+        Return (signature, previous) for a story, where `previous` is the
+        best-matching indexed story from another source, or None. Stories
+        added earlier in the same run are matched exactly like those from
+        earlier runs. The signature is None when there is no usable text.
+        """
+        sig = self.signature(title, summary)
+        if sig is None:
+            return None, None
+        return sig, self.find_previous(sig, source)
+
+    def prune(self):
+        """Forget stories older than ttl_days. Returns the number removed."""
+        cutoff = time.time() - self.ttl_days * 86400
+        with self._lock:
+            stale = [r[0] for r in self._conn.execute("SELECT id FROM stories WHERE seen_at < ?", (cutoff,))]
+            self._conn.executemany("DELETE FROM lsh_buckets WHERE story_id = ?", [(i,) for i in stale])
+            self._conn.executemany("DELETE FROM stories WHERE id = ?", [(i,) for i in stale])
+            self._conn.commit()
+        return len(stale)
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
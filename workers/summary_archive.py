@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime
+
+
+class SummaryArchive:
+    """
+    Append-only JSONL archive of news summaries, one file per UTC day
+    (e.g. data/news_summaries/2025-11-10.jsonl).
+
+    Appends never read or rewrite existing data, so a run costs O(new items)
+    no matter how long the history is.
+    """
+
+    def __init__(self, root="../data/news_summaries", legacy_json_path=None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+        if legacy_json_path and os.path.exists(legacy_json_path):
+            self._migrate_legacy_json(legacy_json_path)
+
+    def partition_path(self, day):
+        """Path of the partition file for a date, datetime or 'YYYY-MM-DD' string."""
+        if not isinstance(day, str):
+            day = day.strftime("%Y-%m-%d")
+        return os.path.join(self.root, f"{day}.jsonl")
+
+    def append(self, summaries, day=None):
+        """
+        Append summaries to the day's partition in a single write.
+
+        The file is opened with O_APPEND and the whole batch goes out in one
+        os.write followed by fsync, so concurrent writers never interleave
+        lines and a crash can at worst leave one torn final line, which
+        iter_summaries() skips.
+        """
+        if not summaries:
+            return 0
+
+        day = day or datetime.utcnow()
+        payload = "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in summaries).encode("utf-8")
+
+        fd = os.open(self.partition_path(day), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Start on a fresh line if a previous append was cut off mid-line
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                payload = b"\n" + payload
+
+            view = memoryview(payload)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        return len(summaries)
+
+    def partitions(self, start=None, end=None):
+        """Partition paths in date order, optionally limited to [start, end] ('YYYY-MM-DD')."""
+        names = sorted(n for n in os.listdir(self.root) if n.endswith(".jsonl"))
+        for name in names:
+            day = name[:-len(".jsonl")]
+            if start and day < start:
+                continue
+            if end and day > end:
+                continue
+            yield os.path.join(self.root, name)
+
+    def iter_summaries(self, start=None, end=None):
+        """Yield summaries one at a time, oldest partition first, without loading whole files."""
+        for path in self.partitions(start, end):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Torn trailing line from an interrupted append
+                        continue
+
+    def _migrate_legacy_json(self, legacy_path):
+        """Split the old single news_summaries.json into daily partitions, once."""
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+
+        by_day = {}
+        for item in legacy:
+            day = (item.get("date") or "")[:10] or datetime.utcnow().strftime("%Y-%m-%d")
+            by_day.setdefault(day, []).append(item)
+
+        for day, items in sorted(by_day.items()):
+            self.append(items, day=day)
+
+        os.replace(legacy_path, legacy_path + ".migrated")
+        print(f"✅ Migrated {len(legacy)} summaries from {legacy_path} into {self.root}")
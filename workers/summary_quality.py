@@ -0,0 +1,39 @@
+import pandas as pd
+
+# Column order matches columns 9–12 of the Inoreader Articles sheet
+FLAG_COLUMNS = ["NeedsCap", "EndsWrong", "TooShort", "TooManySentences"]
+
+# A sentence ends at . ! ? (plus closing quotes/brackets) followed by a capitalized word or the end
+SENTENCE_END_RE = r"[.!?]+[\"'”’)\]]*(?=\s+[\"“(]?[A-Z0-9]|\s*$)"
+# Ellipses and "…" count as a cut-off summary, not a proper ending
+PROPER_ENDING_RE = r"(?<!\.\.)[.!?][\"'”’)\]]*$"
+NEEDS_CAP_RE = r"^[^A-Za-z0-9]*[a-z]"
+
+
+def quality_flags(summaries, min_words=40, max_sentences=6):
+    """
+    Check a batch of summary texts in one vectorized pass.
+
+    Returns a DataFrame with one boolean column per FLAG_COLUMNS entry and
+    one row per summary, in input order:
+      NeedsCap          first letter is lowercase
+      EndsWrong         does not end with . ! or ? (or ends with an ellipsis)
+      TooShort          fewer than `min_words` words
+      TooManySentences  more than `max_sentences` sentences
+    """
+    text = pd.Series(list(summaries), dtype="object").fillna("").astype(str).str.strip()
+
+    words = text.str.count(r"\S+").to_numpy()
+    sentences = text.str.count(SENTENCE_END_RE).to_numpy()
+
+    return pd.DataFrame({
+        "NeedsCap": text.str.contains(NEEDS_CAP_RE, regex=True).to_numpy(dtype=bool),
+        "EndsWrong": ~text.str.contains(PROPER_ENDING_RE, regex=True).to_numpy(dtype=bool),
+        "TooShort": words < min_words,
+        "TooManySentences": sentences > max_sentences,
+    }, columns=FLAG_COLUMNS)
+
+
+def failed_flags(row):
+    """Names of the checks a single row of quality_flags() failed."""
+    return [name for name in FLAG_COLUMNS if row[name]]
@@ -0,0 +1,123 @@
+import html
+import re
+
+import lxml.html
+from lxml import etree
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to a ~4 chars/token estimate
+    tiktoken = None
+
+DEFAULT_ENCODING = "o200k_base"
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Footers and calls to action that feeds append to every item
+BOILERPLATE_PATTERNS = [
+    re.compile(r"The post .{1,300}? appeared first on .{1,120}?\.?$", re.IGNORECASE),
+    # Only a short trailing call to action after the end of a sentence, so
+    # prose like "admins should read more about ..." is left alone
+    re.compile(r"(?<=[.!?…\]])\s*(?:Continue|Keep) reading\b.{0,80}$", re.IGNORECASE),
+    re.compile(
+        r"(?<=[.!?…\]])\s*Read (?:the )?(?:full|more|rest)(?: of)?(?: (?:the )?(?:story|article|post))?\b.{0,80}$",
+        re.IGNORECASE,
+    ),
+    re.compile(r"Follow me on Twitter:.*$", re.IGNORECASE),
+    re.compile(r"Pierluigi Paganini\s*\(SecurityAffairs.*$", re.IGNORECASE),
+    re.compile(r"\[(…|\.\.\.|&#8230;)\]\s*$"),
+]
+
+DROP_TAGS = ("script", "style", "img", "iframe", "noscript", "figure", "svg")
+
+_encodings = {}
+
+
+def _encoding(model=None):
+    """tiktoken encoding for `model`, or None when tiktoken is unavailable."""
+    if tiktoken is None:
+        return None
+
+    key = model or DEFAULT_ENCODING
+    if key not in _encodings:
+        try:
+            _encodings[key] = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception:
+            try:
+                _encodings[key] = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception:
+                _encodings[key] = None
+    return _encodings[key]
+
+
+def count_tokens(text, model=None):
+    """Number of tokens in `text` for `model` (estimated if no local tokenizer is available)."""
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is None:
+        return max(1, len(text) // 4)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def strip_markup(text):
+    """Plain text from an HTML fragment; scripts, images and tracking pixels are dropped."""
+    if not text:
+        return ""
+    if "<" not in text:
+        return html.unescape(text)
+
+    try:
+        root = lxml.html.fragment_fromstring(text, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return html.unescape(re.sub(r"<[^>]+>", " ", text))
+
+    for el in root.iter(*DROP_TAGS):
+        el.drop_tree()
+    # Keep words in adjacent block elements from running together
+    for el in root.iter("p", "br", "div", "li", "h1", "h2", "h3", "h4", "tr"):
+        el.tail = " " + (el.tail or "")
+    return root.text_content()
+
+
+def remove_boilerplate(text):
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub("", text).rstrip()
+    return text
+
+
+def trim_to_tokens(text, budget, model=None):
+    """
+    Cut `text` to at most `budget` tokens, backing off to the last sentence
+    (or word) boundary so the model never sees half a word.
+    """
+    if budget <= 0 or not text:
+        return ""
+
+    enc = _encoding(model)
+    if enc is None:
+        limit = budget * 4
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+    else:
+        tokens = enc.encode(text, disallowed_special=())
+        if len(tokens) <= budget:
+            return text
+        cut = enc.decode(tokens[:budget])
+
+    sentence_end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if sentence_end > len(cut) // 2:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(" ", 1)[0].rstrip(",;:-") + "…"
+
+
+def clean_text(text):
+    """Markup stripped and whitespace collapsed; used as-is for titles."""
+    return WHITESPACE_RE.sub(" ", strip_markup(text)).strip()
+
+
+def normalize_article_text(text, token_budget=300, model=None):
+    """Markup-free, boilerplate-free, whitespace-collapsed text trimmed to `token_budget` tokens."""
+    text = remove_boilerplate(clean_text(text))
+    return trim_to_tokens(text, token_budget, model)
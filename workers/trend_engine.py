@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+
+def url_hash(url):
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def day_number(when=None):
+    """Day ordinal for a date/datetime, an ISO date string ("2025-11-10T..."), or today."""
+    if isinstance(when, (date, datetime)):
+        return when.toordinal()
+    if isinstance(when, str) and len(when) >= 10:
+        try:
+            return date.fromisoformat(when[:10]).toordinal()
+        except ValueError:
+            pass
+    return datetime.utcnow().date().toordinal()
+
+
+class TrendEngine:
+    """
+    Incremental, time-decayed keyword trend scores, persisted between runs.
+
+    Keeps a (keywords x days) matrix of how many articles mentioned each
+    keyword per day over the last `window_days`, plus the articles of that
+    window and their keyword sets. Articles are ingested once (by URL hash),
+    so each run only adds what is new instead of rescanning the sheet.
+
+    A keyword's trend score compares its decayed recent mention rate (half
+    life `half_life_days`) with its baseline rate over the older days of the
+    window: burst = (recent + 1) / (expected + 1), where expected is what the
+    baseline rate predicts for the recent article volume. The burst is
+    weighted by log(1 + recent) so one stray mention doesn't top the list.
+    An article scores its strongest keyword, decayed by the article's age.
+    All scoring is NumPy array math over the stored state.
+
+    `watermark` is saved with the state for callers that ingest a sheet
+    incrementally (the last row ingested, e.g. {"row": 812, "url": ...}).
+    """
+
+    def __init__(self, keywords, path="../data/trend_state.npz", window_days=30, half_life_days=1.5,
+                 recent_days=3):
+        self.keywords = list(keywords)
+        self.path = path
+        self.window_days = window_days
+        self.half_life_days = half_life_days
+        self.recent_days = recent_days
+
+        k = len(self.keywords)
+        self.end_day = day_number()
+        self.counts = np.zeros((k, window_days), dtype=np.float64)
+        self.docs = np.zeros(window_days, dtype=np.float64)
+        self.art_hash = np.zeros(0, dtype=np.uint64)
+        self.art_day = np.zeros(0, dtype=np.int64)
+        self.art_kw = np.zeros((0, k), dtype=bool)
+        self.art_url = np.zeros(0, dtype=str)
+        self.art_title = np.zeros(0, dtype=str)
+        self.watermark = None
+
+        if os.path.exists(path):
+            self._load()
+        self._advance(day_number())
+
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as state:
+            stored_keywords = list(state["keywords"])
+            stored_window = state["counts"].shape[1]
+            if stored_window != self.window_days:
+                print(f"⚠️  Trend state window changed ({stored_window} -> {self.window_days} days); starting fresh")
+                return
+
+            # Map stored keyword rows onto the current keyword list; new keywords start at zero
+            rows = {kw: i for i, kw in enumerate(stored_keywords)}
+            keep = [(i, rows[kw]) for i, kw in enumerate(self.keywords) if kw in rows]
+            new_idx = np.array([i for i, _ in keep], dtype=np.int64)
+            old_idx = np.array([j for _, j in keep], dtype=np.int64)
+
+            if "watermark" in state.files:
+                self.watermark = json.loads(str(state["watermark"]))
+            self.end_day = int(state["end_day"])
+            self.docs = state["docs"].astype(np.float64)
+            self.counts[new_idx] = state["counts"][old_idx]
+            self.art_hash = state["art_hash"]
+            self.art_day = state["art_day"]
+            self.art_url = state["art_url"]
+            self.art_title = state["art_title"]
+            self.art_kw = np.zeros((len(self.art_hash), len(self.keywords)), dtype=bool)
+            self.art_kw[:, new_idx] = state["art_kw"][:, old_idx]
+
+    def _advance(self, today):
+        """Slide the window forward so its last column is `today`, dropping expired days and articles."""
+        shift = today - self.end_day
+        if shift <= 0:
+            return
+        if shift >= self.window_days:
+            self.counts[:] = 0
+            self.docs[:] = 0
+        else:
+            self.counts = np.roll(self.counts, -shift, axis=1)
+            self.counts[:, -shift:] = 0
+            self.docs = np.roll(self.docs, -shift)
+            self.docs[-shift:] = 0
+        self.end_day = today
+
+        live = self.art_day > today - self.window_days
+        self.art_hash = self.art_hash[live]
+        self.art_day = self.art_day[live]
+        self.art_kw = self.art_kw[live]
+        self.art_url = self.art_url[live]
+        self.art_title = self.art_title[live]
+
+    def ingest(self, items):
+        """
+        Add articles not seen before. `items` are (url, title, when, keywords)
+        tuples; `when` is anything day_number() accepts, `keywords` a set of
+        keywords from this engine's list. Returns the number added.
+        """
+        known = set(self.art_hash.tolist())
+        index = {kw: i for i, kw in enumerate(self.keywords)}
+        first_day = self.end_day - self.window_days + 1
+
+        hashes, days, masks, urls, titles = [], [], [], [], []
+        for url, title, when, keywords in items:
+            h = url_hash(url)
+            day = min(day_number(when), self.end_day)
+            if h in known or day < first_day:
+                continue
+            known.add(h)
+
+            mask = np.zeros(len(self.keywords), dtype=bool)
+            mask[[index[kw] for kw in keywords if kw in index]] = True
+            hashes.append(h)
+            days.append(day)
+            masks.append(mask)
+            urls.append(url)
+            titles.append(title or "")
+
+        if not hashes:
+            return 0
+
+        days = np.array(days, dtype=np.int64)
+        masks = np.vstack(masks)
+        cols = days - first_day
+        np.add.at(self.docs, cols, 1)
+        kw_rows, art_rows = np.nonzero(masks.T)
+        np.add.at(self.counts, (kw_rows, cols[art_rows]), 1)
+
+        self.art_hash = np.concatenate([self.art_hash, np.array(hashes, dtype=np.uint64)])
+        self.art_day = np.concatenate([self.art_day, days])
+        self.art_kw = np.vstack([self.art_kw, masks])
+        self.art_url = np.concatenate([self.art_url, np.array(urls, dtype=str)])
+        self.art_title = np.concatenate([self.art_title, np.array(titles, dtype=str)])
+        return len(hashes)
+
+    def _decay(self, ages):
+        return np.power(0.5, ages / self.half_life_days)
+
+    def keyword_scores(self):
+        """(scores, decayed recent counts, burst ratios), one entry per keyword."""
+        ages = np.arange(self.window_days - 1, -1, -1, dtype=np.float64)
+        weights = self._decay(ages)
+        baseline = ages >= self.recent_days
+
+        recent = self.counts @ weights
+        recent_docs = self.docs @ weights
+        base_rate = self.counts[:, baseline].sum(axis=1) / max(self.docs[baseline].sum(), 1.0)
+        expected = base_rate * recent_docs
+
+        burst = (recent + 1.0) / (expected + 1.0)
+        return burst * np.log1p(recent), recent, burst
+
+    def score_items(self, items):
+        """
+        Trend scores for (when, keywords) pairs, vectorized: the strongest
+        keyword's score, decayed by the item's age.
+        """
+        items = list(items)
+        if not items:
+            return np.zeros(0)
+        scores, _, _ = self.keyword_scores()
+        index = {kw: i for i, kw in enumerate(self.keywords)}
+
+        masks = np.zeros((len(items), len(self.keywords)), dtype=bool)
+        for row, (_, keywords) in enumerate(items):
+            masks[row, [index[kw] for kw in keywords if kw in index]] = True
+        ages = np.maximum(self.end_day - np.array([day_number(when) for when, _ in items]), 0)
+
+        return np.where(masks, scores, 0.0).max(axis=1) * self._decay(ages)
+
+    def top_keywords(self, n=10):
+        """Top `n` trending keywords as dicts with score, recent (decayed) mentions and burst ratio."""
+        scores, recent, burst = self.keyword_scores()
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n] if n else []
+        top = sorted(top, key=lambda i: -scores[i])
+        return [
+            {"keyword": self.keywords[i], "score": round(float(scores[i]), 3),
+             "recent": round(float(recent[i]), 2), "burst": round(float(burst[i]), 2)}
+            for i in top if scores[i] > 0
+        ]
+
+    def top_articles(self, n=10):
+        """Top `n` articles in the window by trend score, as dicts with url, title, score and keywords."""
+        if not len(self.art_hash):
+            return []
+        scores, _, _ = self.keyword_scores()
+        article_scores = np.where(self.art_kw, scores, 0.0).max(axis=1) * self._decay(self.end_day - self.art_day)
+
+        n = min(n, len(article_scores))
+        top = np.argpartition(-article_scores, n - 1)[:n]
+        top = sorted(top, key=lambda i: -article_scores[i])
+        return [
+            {"url": str(self.art_url[i]), "title": str(self.art_title[i]),
+             "score": round(float(article_scores[i]), 3),
+             "keywords": [self.keywords[k] for k in np.flatnonzero(self.art_kw[i])]}
+            for i in top if article_scores[i] > 0
+        ]
+
+    def save(self):
+        """Write the state atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                keywords=np.array(self.keywords, dtype=str),
+                end_day=np.array(self.end_day),
+                counts=self.counts,
+                docs=self.docs,
+                art_hash=self.art_hash,
+                art_day=self.art_day,
+                art_kw=self.art_kw,
+                art_url=self.art_url,
+                art_title=self.art_title,
+                watermark=np.array(json.dumps(self.watermark)),
+            )
+        os.replace(tmp_path, self.path)
@@ -2,18 +2,92 @@ import requests
 import os
 from dotenv import load_dotenv
 import json
+import html
 from datetime import datetime
 
+from image_cache import ImageCache
+from outbox import WORDPRESS_POSTS, Outbox, wordpress_post_handler
+
 load_dotenv()
 
 class WordPressPublisher:
-    def __init__(self):
+    def __init__(self, image_cache=None, outbox=None):
         self.wp_url = os.getenv('WP_URL', 'https://roblotech.com')
         self.wp_user = os.getenv('WP_USER', '')
         self.wp_app_password = os.getenv('WP_APP_PASSWORD', '')
         self.auth = (self.wp_user, self.wp_app_password) if self.wp_user and self.wp_app_password else None
+        # Thumbnails the news summarizer already downloaded are reused from here
+        self.image_cache = image_cache
+        # Posts queued with queue_post() wait here until WordPress accepts them
+        self.outbox = outbox
+    
+    def upload_media(self, path, mime_type, filename=None):
+        """Upload a local file to the WordPress media library"""
+        if not self.auth or not self.auth[0] or not self.auth[1]:
+            return {'success': False, 'error': 'WordPress credentials not configured'}
+        
+        endpoint = f"{self.wp_url}/wp-json/wp/v2/media"
+        filename = filename or os.path.basename(path)
+        
+        try:
+            with open(path, 'rb') as f:
+                response = requests.post(
+                    endpoint,
+                    auth=self.auth,
+                    data=f,
+                    headers={
+                        'Content-Type': mime_type,
+                        'Content-Disposition': f'attachment; filename="{filename}"'
+                    },
+                    timeout=60
+                )
+            response.raise_for_status()
+            
+            result = response.json()
+            return {
+                'success': True,
+                'media_id': result.get('id'),
+                'source_url': result.get('source_url')
+            }
+            
+        except (requests.exceptions.RequestException, OSError) as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
     
-    def create_post(self, title, content, status='draft', categories=None, tags=None, featured_media=None):
+    def featured_media_for(self, image_url):
+        """
+        WordPress media id for an image URL, using the shared thumbnail cache:
+        an image already uploaded is reused, and one the summarizer already
+        downloaded is uploaded from disk. Returns None if unavailable.
+        """
+        if not image_url:
+            return None
+        if self.image_cache is None:
+            self.image_cache = ImageCache()
+        
+        image_hash = self.image_cache.hash_for(image_url)
+        if image_hash and self.image_cache.media_id(image_hash):
+            return self.image_cache.media_id(image_hash)
+        
+        image_hash = self.image_cache.fetch(image_url)
+        if not image_hash:
+            return None
+        media_id = self.image_cache.media_id(image_hash)
+        if media_id:
+            return media_id
+        
+        result = self.upload_media(self.image_cache.path(image_hash), self.image_cache.mime(image_hash))
+        if not result.get('success'):
+            print(f"⚠️  Could not upload featured image {image_url}: {result.get('error')}")
+            return None
+        
+        self.image_cache.set_media_id(image_hash, result['media_id'])
+        return result['media_id']
+    
+    def create_post(self, title, content, status='draft', categories=None, tags=None, featured_media=None,
+                    featured_image_url=None):
         """
         Create a WordPress post via REST API
         
@@ -24,6 +98,8 @@ class WordPressPublisher:
             categories (list): List of category IDs
             tags (list): List of tag IDs or tag names
             featured_media (int): Featured image ID
+            featured_image_url (str): Image URL to use when featured_media is not given
+                (uploaded once via the shared thumbnail cache)
         
         Returns:
             dict: API response with post data
@@ -48,6 +124,9 @@ class WordPressPublisher:
         if tags:
             post_data['tags'] = tags
         
+        if not featured_media and featured_image_url:
+            featured_media = self.featured_media_for(featured_image_url)
+        
         if featured_media:
             post_data['featured_media'] = featured_media
         
@@ -76,6 +155,69 @@ class WordPressPublisher:
                 'status_code': getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None
             }
     
+    def queue_post(self, key, title, content, status='draft', categories=None, tags=None,
+                   featured_image_url=None):
+        """
+        Queue a post in the outbox, then publish everything queued.
+        
+        This is the way to publish: `key` identifies the post (e.g. the source
+        article URL), and queueing the same key again does nothing, so reruns
+        never create duplicate posts. Posts that fail stay queued and are
+        retried by later runs or `python outbox.py drain`.
+        
+        Returns:
+            dict: 'queued' (False if the key was queued before), plus 'sent'
+            and 'failed' counts from publish_queued()
+        """
+        if not self.auth or not self.auth[0] or not self.auth[1]:
+            return {
+                'success': False,
+                'error': 'WordPress credentials not configured. Set WP_USER and WP_APP_PASSWORD in .env'
+            }
+        
+        post = {'title': title, 'content': content, 'status': status, 'categories': categories,
+                'tags': tags, 'featured_image_url': featured_image_url}
+        queued = self._outbox().enqueue(WORDPRESS_POSTS, [(key, post)]) > 0
+        return {'queued': queued, **self.publish_queued()}
+    
+    def publish_queued(self):
+        """Create queued posts that are due"""
+        sent, failed = self._outbox().drain([WORDPRESS_POSTS]).get(WORDPRESS_POSTS, (0, 0))
+        return {'success': not failed, 'sent': sent, 'failed': failed}
+    
+    def _outbox(self):
+        if self.outbox is None:
+            self.outbox = Outbox(
+                max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8)),
+                keep_days=float(os.getenv('OUTBOX_KEEP_DAYS', 30)),
+            )
+        if WORDPRESS_POSTS not in self.outbox.handlers:
+            self.outbox.register(WORDPRESS_POSTS, wordpress_post_handler(self), batch_size=10)
+        return self.outbox
+    
+    def find_post_by_title(self, title):
+        """ID of an existing post (any status) with exactly this title, or None"""
+        if not self.auth or not self.auth[0] or not self.auth[1]:
+            return None
+        
+        endpoint = f"{self.wp_url}/wp-json/wp/v2/posts"
+        
+        try:
+            response = requests.get(
+                endpoint,
+                auth=self.auth,
+                params={'search': title, 'status': 'publish,draft,pending,private,future', 'per_page': 20},
+                timeout=30
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        
+        for post in response.json():
+            if html.unescape(post.get('title', {}).get('rendered', '')).strip() == title.strip():
+                return post.get('id')
+        return None
+    
     def update_post(self, post_id, title=None, content=None, status=None, categories=None):
         """Update an existing WordPress post"""
         if not self.auth or not self.auth[0] or not self.auth[1]:
@@ -174,7 +316,9 @@ def example_usage():
     <p>Learn how to set up WordPress REST API authentication with Application Passwords.</p>
     """
     
-    result = publisher.create_post(
+    # One test draft per day at most: the outbox key makes reruns a no-op
+    result = publisher.queue_post(
+        key=f"example:{datetime.now():%Y-%m-%d}",
         title='Test Post from Automation System',
         content=sample_content,
         status='draft'
@@ -182,11 +326,13 @@ def example_usage():
     
     print(json.dumps(result, indent=2))
     
-    if result.get('success'):
+    if result.get('success') and not result['queued']:
+        print(f"\n↩️  Today's test post was already queued; nothing new to publish")
+    elif result.get('success'):
         print(f"\n✅ Post created successfully!")
-        print(f"   Post ID: {result['post_id']}")
-        print(f"   Post URL: {result['post_url']}")
-        print(f"   Status: {result['status']}")
+        print(f"   Posts published: {result['sent']}")
+    elif 'failed' in result:
+        print(f"\n⏳ {result['failed']} post(s) still queued; see `python outbox.py list --target {WORDPRESS_POSTS}`")
     else:
         print(f"\n❌ Error: {result.get('error')}")
 